@@ -0,0 +1,41 @@
+"""add order rollups table
+
+Revision ID: 2d7c5e9a4b16
+Revises: 9f4e2a1b6c37
+Create Date: 2026-10-17 19:02:11.418530
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2d7c5e9a4b16'
+down_revision: Union[str, Sequence[str], None] = '9f4e2a1b6c37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('order_rollups',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('bucket_start', sa.DateTime(), nullable=False),
+    sa.Column('order_count', sa.Integer(), nullable=False),
+    sa.Column('item_count', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Float(), nullable=False),
+    sa.Column('discount', sa.Float(), nullable=False),
+    sa.Column('tax', sa.Float(), nullable=False),
+    sa.Column('refund_count', sa.Integer(), nullable=False),
+    sa.Column('refunds', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'bucket_start')
+    )
+    # Existing orders are loaded with: python -m jobs.backfill_order_rollups
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('order_rollups')
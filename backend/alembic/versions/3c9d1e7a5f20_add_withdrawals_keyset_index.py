@@ -0,0 +1,33 @@
+"""add withdrawals keyset index
+
+Revision ID: 3c9d1e7a5f20
+Revises: ae7410e2b652
+Create Date: 2026-10-17 18:02:41.731964
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c9d1e7a5f20'
+down_revision: Union[str, Sequence[str], None] = 'ae7410e2b652'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_withdrawals_user_id_created_at_id',
+        'withdrawals',
+        ['user_id', sa.text('created_at DESC'), sa.text('id DESC')],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_withdrawals_user_id_created_at_id', table_name='withdrawals')
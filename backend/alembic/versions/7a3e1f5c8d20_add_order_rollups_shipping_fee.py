@@ -0,0 +1,31 @@
+"""add shipping fee to order rollups
+
+Revision ID: 7a3e1f5c8d20
+Revises: 2d7c5e9a4b16
+Create Date: 2026-10-17 19:21:45.201377
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7a3e1f5c8d20'
+down_revision: Union[str, Sequence[str], None] = '2d7c5e9a4b16'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # NULL on existing rows until they are rebuilt with
+    # python -m jobs.backfill_order_rollups; the forecast job refuses to
+    # read them until then rather than count shipping as profit
+    op.add_column('order_rollups', sa.Column('shipping_fee', sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('order_rollups', 'shipping_fee')
@@ -0,0 +1,28 @@
+"""add order item count
+
+Revision ID: 8b2f4c6d9e13
+Revises: 3c9d1e7a5f20
+Create Date: 2026-10-17 18:20:05.264118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b2f4c6d9e13'
+down_revision: Union[str, Sequence[str], None] = '3c9d1e7a5f20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('orders', sa.Column('item_count', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('orders', 'item_count')
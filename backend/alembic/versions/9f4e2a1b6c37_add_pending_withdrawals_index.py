@@ -0,0 +1,34 @@
+"""add pending withdrawals index
+
+Revision ID: 9f4e2a1b6c37
+Revises: 5e1a7b3c2d84
+Create Date: 2026-10-17 19:05:52.117384
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9f4e2a1b6c37'
+down_revision: Union[str, Sequence[str], None] = '5e1a7b3c2d84'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_withdrawals_pending_id',
+        'withdrawals',
+        ['id'],
+        unique=False,
+        postgresql_where=sa.text("status = 'pending'"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_withdrawals_pending_id', table_name='withdrawals')
@@ -0,0 +1,28 @@
+"""add orders keyset index
+
+Revision ID: ae7410e2b652
+Revises: f01e7174b611
+Create Date: 2026-10-17 17:50:12.418305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'ae7410e2b652'
+down_revision: Union[str, Sequence[str], None] = 'f01e7174b611'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_orders_user_id_created_at_id', 'orders', ['user_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_orders_user_id_created_at_id', table_name='orders')
@@ -0,0 +1,44 @@
+"""add withdrawal claims
+
+Revision ID: c5a9d3e7f142
+Revises: 7a3e1f5c8d20
+Create Date: 2026-10-18 10:12:08.551203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5a9d3e7f142'
+down_revision: Union[str, Sequence[str], None] = '7a3e1f5c8d20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('withdrawals', sa.Column('claimed_at', sa.DateTime(), nullable=True))
+    op.drop_index('ix_withdrawals_pending_id', table_name='withdrawals')
+    op.create_index(
+        'ix_withdrawals_unsettled_id',
+        'withdrawals',
+        ['id'],
+        unique=False,
+        postgresql_where=sa.text("status IN ('pending', 'processing')"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_withdrawals_unsettled_id', table_name='withdrawals')
+    op.create_index(
+        'ix_withdrawals_pending_id',
+        'withdrawals',
+        ['id'],
+        unique=False,
+        postgresql_where=sa.text("status = 'pending'"),
+    )
+    op.drop_column('withdrawals', 'claimed_at')
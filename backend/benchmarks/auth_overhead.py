@@ -0,0 +1,72 @@
+"""Per-request authentication overhead, before and after the token caches.
+
+"before" repeats what get_current_user used to do on every request: read
+SECRET_KEY from the environment, verify the JWT signature and look the user
+up by username. "after" calls get_current_user with warm token and
+principal caches.
+
+Run from backend/:
+
+    DATABASE_URL=sqlite:///bench.db python -m benchmarks.auth_overhead -n 20000
+"""
+import argparse
+import asyncio
+import os
+import time
+from datetime import timedelta
+
+from fastapi.security import HTTPAuthorizationCredentials
+from jose import jwt
+from sqlalchemy import select
+
+from config.database import SessionLocal, engine
+from models.model import Base, User
+from utils.util import ALGORITHM, create_access_token, get_current_user
+
+
+async def before(token, db):
+    secret_key = os.getenv("SECRET_KEY")
+    payload = jwt.decode(token, secret_key, algorithms=[ALGORITHM])
+    return await db.scalar(select(User).where(User.username == payload["sub"]))
+
+
+async def after(token, db):
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+    return await get_current_user(credentials, db)
+
+
+async def timed(fn, token, db, iterations):
+    await fn(token, db)  # warm up
+    started = time.perf_counter()
+    for _ in range(iterations):
+        await fn(token, db)
+    return (time.perf_counter() - started) / iterations
+
+
+async def run(args):
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    async with SessionLocal() as db:
+        if not await db.scalar(select(User).where(User.username == "bench")):
+            db.add(User(username="bench", email="bench@example.com", phone_number="0000",
+                        hashed_password="x"))
+            await db.commit()
+        token = create_access_token({"sub": "bench"}, expires_delta=timedelta(hours=1))
+
+        results = {name: await timed(fn, token, db, args.iterations)
+                   for name, fn in (("before", before), ("after", after))}
+    await engine.dispose()
+
+    for name, seconds in results.items():
+        print(f"{name:>6}: {seconds * 1e6:9.1f} us/request")
+    print(f"speedup: {results['before'] / results['after']:.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", "--iterations", type=int, default=10000)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Bulk order ingestion throughput.
+
+Posts --orders synthetic orders to POST /orders/bulk in --batch-size
+requests (JSON or NDJSON) and prints orders/second. The target is 10k
+orders/s against a local PostgreSQL.
+
+Run from backend/ (requires httpx):
+
+    DATABASE_URL=postgresql://localhost/bench python -m benchmarks.bulk_ingest --orders 100000
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+
+import httpx
+
+from config.database import engine
+from main import app
+from models.model import Base
+
+EMAIL = "ingest@example.com"
+PASSWORD = "bench-password"
+STATUSES = ("pending", "paid", "shipped", "delivered", "cancelled", "refunded")
+
+
+def synthetic_orders(count, prefix):
+    for i in range(count):
+        subtotal = round(random.uniform(100, 5000), 2)
+        tax = round(subtotal * 0.17, 2)
+        yield {
+            "order_number": f"{prefix}-{i}",
+            "status": random.choice(STATUSES),
+            "item_count": random.randint(1, 5),
+            "subtotal": subtotal,
+            "tax": tax,
+            "shipping_fee": 150.0,
+            "total": subtotal + tax + 150.0,
+        }
+
+
+async def run(args):
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=300) as client:
+        await client.post("/auth/signup", json={
+            "username": "ingest", "email": EMAIL, "phone_number": "0000", "password": PASSWORD,
+        })
+        response = await client.post("/auth/login", json={"email": EMAIL, "password": PASSWORD})
+        response.raise_for_status()
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        orders = list(synthetic_orders(args.orders, uuid.uuid4().hex[:8]))
+        batches = [orders[i:i + args.batch_size] for i in range(0, len(orders), args.batch_size)]
+        if args.ndjson:
+            bodies = ["\n".join(json.dumps(order) for order in batch) for batch in batches]
+            headers["Content-Type"] = "application/x-ndjson"
+        else:
+            bodies = [json.dumps(batch) for batch in batches]
+            headers["Content-Type"] = "application/json"
+
+        failed = 0
+        started = time.perf_counter()
+        for body in bodies:
+            response = await client.post("/orders/bulk", content=body, headers=headers)
+            response.raise_for_status()
+            failed += response.json()["failed"]
+        elapsed = time.perf_counter() - started
+    await engine.dispose()
+
+    print(f"{args.orders} orders in {len(bodies)} requests: {elapsed:.2f}s "
+          f"({args.orders / elapsed:,.0f} orders/s, {failed} failed)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--orders", type=int, default=50_000)
+    parser.add_argument("--batch-size", type=int, default=5_000)
+    parser.add_argument("--ndjson", action="store_true")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
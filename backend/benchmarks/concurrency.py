@@ -0,0 +1,76 @@
+"""Throughput of one worker as client concurrency grows.
+
+Sends a fixed number of GET /dashboard requests at increasing concurrency
+and prints requests/second for each level. Against a real PostgreSQL the
+async stack keeps scaling until the pool or the CPU saturates; the old
+blocking sessions stayed flat at roughly the concurrency-1 figure.
+
+Point it at a single uvicorn worker for realistic numbers:
+
+    uvicorn main:app --workers 1 &
+    python -m benchmarks.concurrency --base-url http://127.0.0.1:8000
+
+Without --base-url the app is driven in-process (requires httpx).
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+EMAIL = "concurrency@example.com"
+PASSWORD = "bench-password"
+
+
+async def client_for(base_url):
+    if base_url:
+        return httpx.AsyncClient(base_url=base_url, timeout=60)
+
+    from config.database import engine
+    from main import app
+    from models.model import Base
+
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+
+
+async def level(client, headers, concurrency, requests):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            response = await client.get("/dashboard", headers=headers)
+            response.raise_for_status()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return requests / (time.perf_counter() - started)
+
+
+async def run(args):
+    async with await client_for(args.base_url) as client:
+        await client.post("/auth/signup", json={
+            "username": "concurrency", "email": EMAIL, "phone_number": "0000", "password": PASSWORD,
+        })
+        response = await client.post("/auth/login", json={"email": EMAIL, "password": PASSWORD})
+        response.raise_for_status()
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        baseline = None
+        for concurrency in args.levels:
+            throughput = await level(client, headers, concurrency, args.requests)
+            baseline = baseline or throughput
+            print(f"concurrency={concurrency:<4} {throughput:9.1f} req/s  ({throughput / baseline:.1f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", help="URL of a running server; defaults to in-process")
+    parser.add_argument("--requests", type=int, default=500, help="requests per concurrency level")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 4, 16, 64])
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
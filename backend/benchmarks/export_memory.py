@@ -0,0 +1,151 @@
+"""Memory use of a streaming order export.
+
+Seeds --orders synthetic orders for one seller, streams GET /orders/export
+through the app and discards the body, then reports throughput and how far
+peak RSS grew during the export. Exits non-zero when growth exceeds
+--max-rss-mb, so it can guard against exports buffering the whole result.
+
+Run from backend/ (requires httpx):
+
+    DATABASE_URL=postgresql://localhost/bench python -m benchmarks.export_memory --orders 1000000
+"""
+import argparse
+import asyncio
+import gc
+import resource
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import httpx
+from sqlalchemy import insert, select
+
+from config.database import engine
+from main import app
+from models.model import Base, Order, User
+
+EMAIL = "export@example.com"
+PASSWORD = "bench-password"
+SEED_CHUNK = 10_000
+
+
+def rss_mb():
+    # Current RSS on Linux; elsewhere fall back to the peak (ru_maxrss, in
+    # kilobytes on Linux and bytes on macOS), which seeding may already set
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * resource.getpagesize() / 2**20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def seed(user_id, count):
+    prefix = uuid.uuid4().hex[:8]
+    start = datetime.utcnow() - timedelta(seconds=count)
+    async with engine.begin() as connection:
+        for offset in range(0, count, SEED_CHUNK):
+            await connection.execute(insert(Order), [
+                {
+                    "user_id": user_id,
+                    "order_number": f"{prefix}-{i}",
+                    "status": "paid",
+                    "item_count": 1,
+                    "subtotal": 1000.0,
+                    "tax": 170.0,
+                    "shipping_fee": 150.0,
+                    "total": 1320.0,
+                    "created_at": start + timedelta(seconds=i),
+                }
+                for i in range(offset, min(offset + SEED_CHUNK, count))
+            ])
+
+
+async def stream_export(authorization, fmt, gzip):
+    """Call the app directly and count body bytes without keeping them.
+
+    httpx's ASGITransport collects the whole body before returning it,
+    which would hide whether the endpoint itself streams.
+    """
+    query = f"format={fmt}&gzip={str(gzip).lower()}".encode()
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/orders/export", "raw_path": b"/orders/export",
+        "query_string": query, "root_path": "", "server": ("bench", 80), "client": ("127.0.0.1", 0),
+        "headers": [(b"host", b"bench"), (b"authorization", authorization.encode())],
+    }
+    received = 0
+    status = None
+    peak = rss_mb()
+    requested = False
+    finished = asyncio.Event()
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # StreamingResponse listens for a disconnect while it sends
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal received, status, peak
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            received += len(message.get("body", b""))
+            peak = max(peak, rss_mb())
+            if not message.get("more_body", False):
+                finished.set()
+
+    await app(scope, receive, send)
+    if status != 200:
+        raise RuntimeError(f"export returned {status}")
+    return received, peak
+
+
+async def run(args):
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        await client.post("/auth/signup", json={
+            "username": "export", "email": EMAIL, "phone_number": "0000", "password": PASSWORD,
+        })
+        response = await client.post("/auth/login", json={"email": EMAIL, "password": PASSWORD})
+        response.raise_for_status()
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        async with engine.connect() as connection:
+            user_id = (await connection.execute(select(User.id).where(User.email == EMAIL))).scalar_one()
+        started = time.perf_counter()
+        await seed(user_id, args.orders)
+        print(f"seeded {args.orders} orders in {time.perf_counter() - started:.1f}s")
+
+        gc.collect()
+        baseline = rss_mb()
+        started = time.perf_counter()
+        received, peak = await stream_export(headers["Authorization"], args.format, args.gzip)
+        elapsed = time.perf_counter() - started
+        growth = peak - baseline
+    await engine.dispose()
+
+    print(f"exported {received / 1e6:.1f} MB in {elapsed:.2f}s "
+          f"({args.orders / elapsed:,.0f} rows/s), peak RSS grew {growth:.1f} MB")
+    if growth > args.max_rss_mb:
+        print(f"FAIL: RSS growth above {args.max_rss_mb} MB")
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--orders", type=int, default=1_000_000)
+    parser.add_argument("--format", choices=("csv", "ndjson"), default="csv")
+    parser.add_argument("--gzip", action="store_true")
+    parser.add_argument("--max-rss-mb", type=float, default=100)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
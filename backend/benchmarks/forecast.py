@@ -0,0 +1,136 @@
+"""Time the vectorized profit forecast on a synthetic seller population.
+
+Generates --sellers x --days of daily profit (trend, weekly seasonality,
+noise, and a share of sparse sellers), times forecast_profits over all of
+them, and checks it against a per-seller weighted least-squares loop on
+--check sellers, reporting the speedup and the forecast error against the
+generating model. With --write, also times the bulk UPDATE of every
+seller's dashboard in a scratch SQLite database, then the same write again,
+which should find nothing changed.
+
+Run from backend/ (needs numpy):
+
+    python -m benchmarks.forecast --sellers 100000 --days 365
+    python -m benchmarks.forecast --sellers 100000 --days 365 --write
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from utils.forecast import FORECAST_HALF_LIFE_DAYS, FORECAST_MIN_ACTIVE_DAYS, _design, forecast_profits
+
+FIRST_WEEKDAY = 2  # the synthetic history starts on a Wednesday
+WEEKLY_PATTERN = np.array([0.9, 0.95, 1.0, 1.0, 1.1, 1.35, 0.7], dtype=np.float32)
+
+
+def synthetic(rng, sellers, days, horizon):
+    """Daily profit for the history and the noise-free total over the horizon."""
+    base = rng.lognormal(mean=8.0, sigma=1.0, size=(sellers, 1)).astype(np.float32)
+    growth = rng.uniform(-0.5, 1.5, size=(sellers, 1)).astype(np.float32)  # change over the history
+    t = np.arange(days + horizon, dtype=np.float32) / days
+    weekly = WEEKLY_PATTERN[(FIRST_WEEKDAY + np.arange(days + horizon)) % 7]
+    expected = base * np.maximum(1 + growth * t, 0) * weekly
+    daily = expected[:, :days] * rng.normal(1.0, 0.15, size=(sellers, days)).astype(np.float32)
+    np.maximum(daily, 0, out=daily)
+    # One seller in ten sells on a few days only
+    sparse = rng.random(sellers) < 0.1
+    daily[sparse] *= rng.random((int(sparse.sum()), days)) < 0.02
+    return daily, expected[:, days:].sum(axis=1), sparse
+
+
+def per_seller(daily, horizon):
+    """The same forecast, one least-squares fit per seller."""
+    days = daily.shape[1]
+    history = np.arange(days)
+    design = _design(history, FIRST_WEEKDAY, days)
+    future = _design(np.arange(days, days + horizon), FIRST_WEEKDAY, days).sum(axis=0)
+    recency = 0.5 ** ((days - 1 - history) / FORECAST_HALF_LIFE_DAYS)
+    root = np.sqrt(recency)[:, None]
+    forecasts = []
+    for row in daily.astype(np.float64):
+        if np.count_nonzero(row) >= FORECAST_MIN_ACTIVE_DAYS:
+            beta = np.linalg.lstsq(design * root, row * root[:, 0], rcond=None)[0]
+            forecast = future @ beta
+        else:
+            forecast = row @ recency / recency.sum() * horizon
+        forecasts.append(round(forecast, 2))
+    return np.array(forecasts)
+
+
+async def time_write(sellers, forecasts):
+    path = os.path.join(tempfile.mkdtemp(), "forecast.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    from sqlalchemy import insert
+
+    from config.database import SessionLocal, engine
+    from models.model import Base, Dashboard
+    from utils.forecast import write_forecasts
+
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+        await connection.execute(insert(Dashboard), [{"user_id": user_id} for user_id in range(1, sellers + 1)])
+    user_ids = np.arange(1, sellers + 1)
+    timings = []
+    async with SessionLocal() as db:
+        for _ in range(2):
+            started = time.perf_counter()
+            changed = await write_forecasts(db, user_ids, forecasts)
+            timings.append((time.perf_counter() - started, changed))
+    await engine.dispose()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sellers", type=int, default=100_000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--horizon", type=int, default=30)
+    parser.add_argument("--check", type=int, default=1000, help="sellers to fit one by one for comparison")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--write", action="store_true", help="also time the bulk UPDATE on SQLite")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    daily, truth, sparse = synthetic(rng, args.sellers, args.days, args.horizon)
+    print(f"{args.sellers} sellers x {args.days} days ({daily.nbytes / 2**20:.0f} MiB float32), "
+          f"{args.horizon}-day horizon")
+
+    timings = []
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        forecasts = forecast_profits(daily, FIRST_WEEKDAY, args.horizon)
+        timings.append(time.perf_counter() - started)
+    vectorized = min(timings)
+    print(f"vectorized  {vectorized * 1000:9.1f} ms  ({vectorized / args.sellers * 1e6:.2f} us/seller)")
+
+    sample = slice(0, min(args.check, args.sellers))
+    started = time.perf_counter()
+    reference = per_seller(daily[sample], args.horizon)
+    looped = (time.perf_counter() - started) / len(reference) * args.sellers
+    print(f"per-seller  {looped * 1000:9.1f} ms  (extrapolated from {len(reference)} sellers, "
+          f"{looped / vectorized:.0f}x slower)")
+
+    mismatch = np.abs(forecasts[sample] - reference) / np.maximum(np.abs(reference), 1.0)
+    dense = ~sparse
+    error = np.abs(forecasts[dense] - truth[dense]) / np.maximum(truth[dense], 1.0)
+    print(f"max relative difference from per-seller fit {mismatch.max():.2e}")
+    print(f"median absolute error vs generating model (dense sellers) {np.median(error) * 100:.1f}%")
+
+    if args.write:
+        (first, written), (again, rewritten) = asyncio.run(time_write(args.sellers, forecasts))
+        print(f"bulk UPDATE {first * 1000:9.1f} ms  ({written} rows changed, SQLite)")
+        print(f"rerun       {again * 1000:9.1f} ms  ({rewritten} rows changed)")
+
+    if mismatch.max() > 1e-3:
+        print("FAIL: vectorized forecast disagrees with the per-seller fit")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
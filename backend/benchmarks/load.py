@@ -0,0 +1,305 @@
+"""Mixed-traffic load test with per-endpoint latency percentiles.
+
+Seeds --users sellers through the API (signup, login, a starting balance
+credited through PATCH /admin/dashboards, --orders-per-user orders via
+/orders/bulk and --withdrawals-per-user withdrawals), then sends
+--requests requests at --concurrency drawn from a weighted endpoint mix.
+The mix and the choice of seller per request come from --seed, so runs
+are repeatable. Prints, or writes with --output, a JSON report with
+throughput and p50/p95/p99 per endpoint. --compare fails the run when an
+endpoint regressed against an earlier report by more than --tolerance.
+
+Runs in-process against DATABASE_URL (SQLite is fine for smoke runs;
+tables are created if missing), or against a running server:
+
+    DATABASE_URL=postgresql://localhost/bench python -m benchmarks.load --output before.json
+    ... change things ...
+    DATABASE_URL=postgresql://localhost/bench python -m benchmarks.load --compare before.json
+
+    ADMIN_TOKEN=... python -m benchmarks.load --base-url http://127.0.0.1:8000 --concurrency 64
+
+A running server must have ADMIN_TOKEN set to the same value.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import uuid
+from collections import defaultdict
+
+import httpx
+
+PASSWORD = "bench-password"
+STARTING_BALANCE = 1_000_000.0
+
+# Relative weights of each endpoint in the generated traffic
+DEFAULT_MIX = {
+    "dashboard": 35,
+    "orders": 25,
+    "withdraw_history": 15,
+    "withdraw": 10,
+    "login": 10,
+    "signup": 5,
+}
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, round(fraction * len(sorted_values) + 0.5))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+async def client_for(base_url):
+    if base_url:
+        return httpx.AsyncClient(base_url=base_url, timeout=120)
+
+    os.environ.setdefault("RATE_LIMITING", "off")  # measure the app, not the limiter
+    os.environ.setdefault("ADMIN_TOKEN", "bench-admin-token")
+    from config.database import engine
+    from main import app
+    from models.model import Base
+
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=120)
+
+
+def synthetic_orders(rng, prefix, count):
+    statuses = ("pending", "paid", "shipped", "delivered", "cancelled")
+    for i in range(count):
+        subtotal = round(rng.uniform(100, 5000), 2)
+        yield {
+            "order_number": f"{prefix}-{i}",
+            "status": rng.choice(statuses),
+            "item_count": rng.randint(1, 5),
+            "subtotal": subtotal,
+            "tax": round(subtotal * 0.17, 2),
+            "shipping_fee": 150.0,
+            "total": round(subtotal * 1.17 + 150.0, 2),
+        }
+
+
+class Seller:
+    def __init__(self, username):
+        self.username = username
+        self.email = f"{username}@bench.example.com"
+        self.headers = {}
+
+
+async def signup(client, username):
+    return await client.post("/auth/signup", json={
+        "username": username, "email": f"{username}@bench.example.com",
+        "phone_number": "03000000000", "password": PASSWORD,
+    })
+
+
+async def login(client, seller):
+    return await client.post("/auth/login", json={"email": seller.email, "password": PASSWORD})
+
+
+async def seed(client, args, rng, run_id):
+    sellers = []
+    for i in range(args.users):
+        seller = Seller(f"load-{run_id}-{i}")
+        response = await signup(client, seller.username)
+        response.raise_for_status()
+        credit = [{"user_id": response.json()["data"]["user_id"], "balance_adjustment": STARTING_BALANCE}]
+        (await client.patch("/admin/dashboards", json=credit,
+                            headers={"X-Admin-Token": os.getenv("ADMIN_TOKEN", "")})).raise_for_status()
+        response = await login(client, seller)
+        response.raise_for_status()
+        seller.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        if args.orders_per_user:
+            orders = list(synthetic_orders(rng, seller.username, args.orders_per_user))
+            (await client.post("/orders/bulk", json=orders, headers=seller.headers)).raise_for_status()
+        for _ in range(args.withdrawals_per_user):
+            (await client.post("/withdraw", json=withdrawal_body(rng), headers=seller.headers)).raise_for_status()
+        sellers.append(seller)
+    return sellers
+
+
+def withdrawal_body(rng):
+    return {
+        "method": rng.choice(("easypaisa", "jazzcash")),
+        "phone_number": "03000000000",
+        "amount": round(rng.uniform(10, 500), 2),
+    }
+
+
+async def call(client, endpoint, seller, rng, run_id, sequence):
+    if endpoint == "dashboard":
+        return await client.get("/dashboard", headers=seller.headers)
+    if endpoint == "orders":
+        return await client.get("/orders", headers=seller.headers)
+    if endpoint == "withdraw_history":
+        return await client.get("/withdraw/history", headers=seller.headers)
+    if endpoint == "withdraw":
+        return await client.post("/withdraw", json=withdrawal_body(rng), headers=seller.headers)
+    if endpoint == "login":
+        return await login(client, seller)
+    if endpoint == "signup":
+        return await signup(client, f"load-{run_id}-new-{sequence}")
+    raise ValueError(f"Unknown endpoint {endpoint}")
+
+
+async def drive(client, sellers, args, rng, run_id):
+    mix = {name: weight for name, weight in args.mix.items() if weight > 0}
+    # Draw the whole schedule up front so it doesn't depend on timing
+    plan = [
+        (endpoint, rng.choice(sellers), random.Random(rng.random()))
+        for endpoint in rng.choices(list(mix), weights=list(mix.values()), k=args.requests)
+    ]
+    latencies = defaultdict(list)
+    statuses = defaultdict(lambda: defaultdict(int))
+    queue = iter(enumerate(plan))
+
+    async def worker():
+        for sequence, (endpoint, seller, request_rng) in queue:
+            started = time.perf_counter()
+            try:
+                response = await call(client, endpoint, seller, request_rng, run_id, sequence)
+                status = str(response.status_code)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            latencies[endpoint].append(time.perf_counter() - started)
+            statuses[endpoint][status] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    return latencies, statuses, time.perf_counter() - started
+
+
+def summarize(samples, status_counts, elapsed):
+    samples = sorted(samples)
+    errors = sum(count for status, count in status_counts.items() if not status.startswith("2"))
+    ms = lambda value: None if value is None else round(value * 1000, 2)  # noqa: E731
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "statuses": dict(status_counts),
+        "throughput_rps": round(len(samples) / elapsed, 1),
+        "mean_ms": ms(sum(samples) / len(samples)) if samples else None,
+        "p50_ms": ms(percentile(samples, 0.50)),
+        "p95_ms": ms(percentile(samples, 0.95)),
+        "p99_ms": ms(percentile(samples, 0.99)),
+        "max_ms": ms(samples[-1]) if samples else None,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report, baseline, tolerance):
+    """Endpoints whose p95 rose or throughput fell by more than `tolerance`."""
+    regressions = []
+    for endpoint, current in report["endpoints"].items():
+        previous = baseline.get("endpoints", {}).get(endpoint)
+        if not previous or not previous.get("p95_ms") or not current.get("p95_ms"):
+            continue
+        if current["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{endpoint}: p95 {previous['p95_ms']} -> {current['p95_ms']} ms")
+        if current["throughput_rps"] < previous["throughput_rps"] * (1 - tolerance):
+            regressions.append(
+                f"{endpoint}: throughput {previous['throughput_rps']} -> {current['throughput_rps']} req/s"
+            )
+    return regressions
+
+
+async def run(args):
+    rng = random.Random(args.seed)
+    run_id = uuid.uuid4().hex[:8]  # keeps usernames unique when the database is reused
+    async with await client_for(args.base_url) as client:
+        seed_started = time.perf_counter()
+        sellers = await seed(client, args, rng, run_id)
+        seed_seconds = time.perf_counter() - seed_started
+        latencies, statuses, elapsed = await drive(client, sellers, args, rng, run_id)
+    if not args.base_url:
+        from config.database import engine
+        await engine.dispose()
+
+    everything = [sample for samples in latencies.values() for sample in samples]
+    all_statuses = defaultdict(int)
+    for counts in statuses.values():
+        for status, count in counts.items():
+            all_statuses[status] += count
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "target": args.base_url or "in-process",
+            "python": platform.python_version(),
+            "seed": args.seed,
+            "users": args.users,
+            "orders_per_user": args.orders_per_user,
+            "withdrawals_per_user": args.withdrawals_per_user,
+            "concurrency": args.concurrency,
+            "mix": args.mix,
+            "seed_seconds": round(seed_seconds, 2),
+            "elapsed_seconds": round(elapsed, 2),
+        },
+        "total": summarize(everything, all_statuses, elapsed),
+        "endpoints": {
+            endpoint: summarize(latencies[endpoint], statuses[endpoint], elapsed)
+            for endpoint in sorted(latencies)
+        },
+    }
+
+
+def parse_mix(value):
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"unknown endpoint {name!r}; choose from {', '.join(DEFAULT_MIX)}")
+        mix[name] = float(weight)
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", help="URL of a running server; defaults to in-process")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--orders-per-user", type=int, default=200)
+    parser.add_argument("--withdrawals-per-user", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX,
+                        help="endpoint weights, e.g. dashboard=50,orders=50")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--compare", help="earlier JSON report to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed p95 increase / throughput drop for --compare (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
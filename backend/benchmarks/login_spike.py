@@ -0,0 +1,94 @@
+"""Dashboard latency under a burst of concurrent logins.
+
+Polls GET /dashboard at a steady rate, first on its own and then while a
+burst of logins runs alongside, and prints the p50/p99 of both phases. With
+bcrypt on the password-hash pool the two p99s should stay close; with
+hashing inline on the event loop the second one grows with the burst size.
+
+Run from backend/ (requires httpx):
+
+    DATABASE_URL=sqlite:///bench.db python -m benchmarks.login_spike --logins 200
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+import httpx
+
+os.environ.setdefault("RATE_LIMITING", "off")  # measure the app, not the limiter
+
+from config.database import engine
+from main import app
+from models.model import Base
+
+EMAIL = "bench@example.com"
+PASSWORD = "bench-password"
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def poll_dashboard(client, headers, stop, interval):
+    latencies = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        response = await client.get("/dashboard", headers=headers)
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - started)
+        await asyncio.sleep(interval)
+    return latencies
+
+
+async def login(client, semaphore):
+    async with semaphore:
+        await client.post("/auth/login", json={"email": EMAIL, "password": PASSWORD})
+
+
+async def run(args):
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.post("/auth/signup", json={
+            "username": "bench", "email": EMAIL, "phone_number": "0000", "password": PASSWORD,
+        })
+        response = await client.post("/auth/login", json={"email": EMAIL, "password": PASSWORD})
+        response.raise_for_status()
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        stop = asyncio.Event()
+        poller = asyncio.create_task(poll_dashboard(client, headers, stop, args.interval))
+        await asyncio.sleep(args.baseline)
+        stop.set()
+        baseline = await poller
+
+        stop = asyncio.Event()
+        poller = asyncio.create_task(poll_dashboard(client, headers, stop, args.interval))
+        semaphore = asyncio.Semaphore(args.concurrency)
+        started = time.perf_counter()
+        await asyncio.gather(*(login(client, semaphore) for _ in range(args.logins)))
+        burst_seconds = time.perf_counter() - started
+        stop.set()
+        under_load = await poller
+
+    for name, samples in (("idle", baseline), ("logins", under_load)):
+        print(f"{name:>7}: n={len(samples):<5} p50={statistics.median(samples) * 1000:8.2f} ms "
+              f"p99={percentile(samples, 99) * 1000:8.2f} ms")
+    print(f"{args.logins} logins in {burst_seconds:.2f}s ({args.logins / burst_seconds:.1f}/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--interval", type=float, default=0.01, help="seconds between dashboard polls")
+    parser.add_argument("--baseline", type=float, default=2.0, help="seconds of idle polling")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
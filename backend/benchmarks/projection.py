@@ -0,0 +1,81 @@
+"""Per-row cost of loading full entities versus projected columns.
+
+Loads --rows orders from an in-memory SQLite database as full Order
+entities (select(Order)) and as the OrderResponse projection used by
+GET /orders, and reports statements issued, time per row and peak Python
+allocations (tracemalloc) for each. Exits non-zero if the projection
+issues more statements or allocates more than the entity load.
+
+Run from backend/:
+
+    python -m benchmarks.projection --rows 10000
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, event, insert, select
+from sqlalchemy.orm import Session
+
+from models.model import Base, Order
+from utils.pydantic import OrderResponse
+from utils.serialization import RowSerializer
+
+
+def measure(engine, statement, scalars):
+    statements = 0
+
+    def count(*args):
+        nonlocal statements
+        statements += 1
+
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        with Session(engine) as session:
+            tracemalloc.start()
+            started = time.perf_counter()
+            result = session.execute(statement)
+            rows = result.scalars().all() if scalars else result.all()
+            elapsed = time.perf_counter() - started
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+    return {"statements": statements, "us_per_row": elapsed / len(rows) * 1e6, "peak_kb": peak / 1024}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    start = datetime(2025, 1, 1)
+    with engine.begin() as connection:
+        connection.execute(insert(Order), [
+            {
+                "user_id": 1, "order_number": f"ORD-{i}", "status": "paid", "currency": "PKR",
+                "subtotal": 1000.0, "discount": 0.0, "tax": 170.0, "shipping_fee": 150.0,
+                "total": 1320.0, "created_at": start + timedelta(minutes=i), "paid_at": start,
+            }
+            for i in range(args.rows)
+        ])
+
+    columns = RowSerializer(OrderResponse).columns(Order)
+    entities = measure(engine, select(Order), scalars=True)
+    projected = measure(engine, select(*columns), scalars=False)
+
+    for name, result in (("entities", entities), ("projection", projected)):
+        print(f"{name:<11} {result['statements']} statements  {result['us_per_row']:6.2f} us/row  "
+              f"{result['peak_kb']:9.0f} KB peak")
+    print(f"projection allocates {entities['peak_kb'] / projected['peak_kb']:.1f}x less")
+    if projected["statements"] > entities["statements"] or projected["peak_kb"] >= entities["peak_kb"]:
+        print("FAIL: projection is not cheaper than loading entities")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Cost of a rate-limit check and what it saves under a login flood.
+
+First times MemoryBuckets.take with 1k and --keys distinct buckets, which
+should cost the same per check. Then sends --logins wrong-password logins
+for one account from one client at --concurrency with limiting on, and
+prints how many reached bcrypt (401) and how many were turned away (429,
+all with Retry-After), with the latency of each.
+
+Run from backend/ (requires httpx):
+
+    DATABASE_URL=sqlite:////tmp/ratelimit.db python -m benchmarks.rate_limit --logins 500
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+import uuid
+
+import httpx
+
+os.environ["RATE_LIMITING"] = "on"
+# Leave the flood to the per-IP limit
+os.environ.setdefault("RATE_LIMIT_LOGIN_PER_ACCOUNT", "off")
+os.environ.setdefault("RATE_LIMIT_LOGIN_PER_ACCOUNT_IP", "off")
+
+from config.database import engine
+from main import app
+from models.model import Base
+from utils.rate_limit import LOGIN_PER_IP, MemoryBuckets, Rate
+
+
+async def time_checks(keys, checks):
+    store = MemoryBuckets(max_keys=keys)
+    rate = Rate(capacity=10, per_second=1)
+    names = [f"login_ip:10.0.{i // 256}.{i % 256}" for i in range(keys)]
+    for name in names:
+        await store.take(name, rate)
+    started = time.perf_counter()
+    for i in range(checks):
+        await store.take(names[i % keys], rate)
+    return (time.perf_counter() - started) / checks
+
+
+async def flood(args):
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    username = f"flood-{uuid.uuid4().hex[:8]}"
+    email = f"{username}@bench.example.com"
+    latencies = {}
+    missing_retry_after = 0
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench",
+                                 timeout=120) as client:
+        (await client.post("/auth/signup", json={
+            "username": username, "email": email, "phone_number": "03000000000", "password": "right-password",
+        })).raise_for_status()
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def attempt():
+            nonlocal missing_retry_after
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post("/auth/login", json={"email": email, "password": "wrong-password"})
+                latencies.setdefault(response.status_code, []).append(time.perf_counter() - started)
+                if response.status_code == 429 and "retry-after" not in response.headers:
+                    missing_retry_after += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(attempt() for _ in range(args.logins)))
+        elapsed = time.perf_counter() - started
+    await engine.dispose()
+    return latencies, missing_retry_after, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--keys", type=int, default=100_000)
+    parser.add_argument("--checks", type=int, default=200_000)
+    parser.add_argument("--logins", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+
+    for keys in (1000, args.keys):
+        per_check = asyncio.run(time_checks(keys, args.checks))
+        print(f"{keys:>7} buckets  {per_check * 1e6:.2f} us/check")
+
+    latencies, missing_retry_after, elapsed = asyncio.run(flood(args))
+    window = LOGIN_PER_IP.capacity / LOGIN_PER_IP.per_second
+    print(f"{args.logins} logins in {elapsed:.2f}s, per-IP limit {LOGIN_PER_IP.capacity:g} per {window:g}s")
+    for code, samples in sorted(latencies.items()):
+        print(f"  {code}: {len(samples):>5}  median {statistics.median(samples) * 1000:8.2f} ms")
+    if not latencies.get(429) or missing_retry_after:
+        print("FAIL: the flood was not limited, or a 429 lacked Retry-After")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Response build time for large list payloads.
+
+Loads --rows orders into an in-memory SQLite database and times turning
+them into a JSON response body three ways:
+
+  fastapi     per-row OrderResponse, then FastAPI's response_model pass
+              (validate, jsonable_encoder, json.dumps) - the old path
+  orm         RowSerializer over ORM entities (TypeAdapter batch)
+  projection  RowSerializer over Row tuples of exactly the response
+              fields (orjson, no model per row)
+
+Run from backend/:
+
+    python -m benchmarks.serialization --rows 10000
+"""
+import argparse
+import statistics
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+
+from models.model import Base, Order
+from utils.pydantic import OrderResponse
+from utils.serialization import RowSerializer
+
+
+def fastapi_path(orders):
+    models = [OrderResponse.model_validate(order) for order in orders]
+    validated = TypeAdapter(List[OrderResponse]).validate_python(models, from_attributes=True)
+    return JSONResponse(jsonable_encoder(validated)).body
+
+
+def timed(build, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = build()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000, len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=7)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    start = datetime(2025, 1, 1)
+    with engine.begin() as connection:
+        connection.execute(insert(Order), [
+            {
+                "user_id": 1, "order_number": f"ORD-{i}", "status": "paid", "currency": "PKR",
+                "subtotal": 1000.0, "discount": 0.0, "tax": 170.0, "shipping_fee": 150.0,
+                "total": 1320.0, "created_at": start + timedelta(minutes=i),
+            }
+            for i in range(args.rows)
+        ])
+
+    serializer = RowSerializer(OrderResponse)
+    columns = [getattr(Order, name) for name in serializer.fields]
+    with Session(engine) as session:
+        orders = session.scalars(select(Order)).all()
+        rows = session.execute(select(*columns)).all()
+
+        results = {
+            "fastapi": timed(lambda: fastapi_path(orders), args.repeat),
+            "orm": timed(lambda: serializer.dump_list(orders), args.repeat),
+            "projection": timed(lambda: serializer.dump_list(rows), args.repeat),
+        }
+
+    baseline = results["fastapi"][0]
+    for name, (ms, size) in results.items():
+        print(f"{name:<11} {ms:8.1f} ms  {size / 1e6:5.2f} MB  {baseline / ms:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Signup throughput when seeding many accounts.
+
+Sends --users signups through POST /auth/signup at --concurrency, plus
+--duplicates retries of names already taken, and prints signups/sec, SQL
+statements per signup and the share of duplicates rejected. Every new
+account is checked to have its dashboard row.
+
+bcrypt dominates a real signup; --hash-rounds lowers its cost factor for
+the run so the database path is what gets measured. SQLite takes one
+writer at a time, so keep --concurrency low there or it reports "database
+is locked".
+
+Run from backend/ (requires httpx):
+
+    DATABASE_URL=sqlite:////tmp/signup.db python -m benchmarks.signup --users 2000 --hash-rounds 4 --concurrency 4
+    DATABASE_URL=postgresql://localhost/bench python -m benchmarks.signup --users 2000 --concurrency 32
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+import uuid
+
+import httpx
+from sqlalchemy import event, func, select
+
+os.environ.setdefault("RATE_LIMITING", "off")  # measure the app, not the limiter
+
+from config.database import SessionLocal, engine
+from main import app
+from models.model import Base, Dashboard, User
+from utils.util import pwd_context
+
+
+def body(username):
+    return {
+        "username": username, "email": f"{username}@bench.example.com",
+        "phone_number": "03000000000", "password": "bench-password",
+    }
+
+
+async def run(args):
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+
+    run_id = uuid.uuid4().hex[:8]
+    names = [f"signup-{run_id}-{i}" for i in range(args.users)]
+    plan = names + names[:args.duplicates]
+    statuses = {}
+    statements = 0
+
+    def count(*_):
+        nonlocal statements
+        statements += 1
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        queue = iter(plan)
+
+        async def worker():
+            for username in queue:
+                response = await client.post("/auth/signup", json=body(username))
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        event.listen(engine.sync_engine, "before_cursor_execute", count)
+        started = time.perf_counter()
+        try:
+            # Whichever of a duplicate pair commits second is rejected
+            await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        finally:
+            elapsed = time.perf_counter() - started
+            event.remove(engine.sync_engine, "before_cursor_execute", count)
+
+    async with SessionLocal() as db:
+        without_dashboard = await db.scalar(
+            select(func.count(User.id))
+            .outerjoin(Dashboard, Dashboard.user_id == User.id)
+            .where(User.username.like(f"signup-{run_id}-%"), Dashboard.id.is_(None))
+        )
+    await engine.dispose()
+    return statuses, statements, elapsed, without_dashboard
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--duplicates", type=int, default=100, help="signups reusing a taken username/email")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--hash-rounds", type=int, help="bcrypt cost factor for this run (default: the app's)")
+    args = parser.parse_args()
+    if args.hash_rounds:
+        pwd_context.update(bcrypt__rounds=args.hash_rounds)
+
+    statuses, statements, elapsed, without_dashboard = asyncio.run(run(args))
+    created = statuses.get(200, 0)
+    rejected = statuses.get(400, 0)
+    total = args.users + args.duplicates
+    print(f"{created} signups, {rejected} duplicates rejected, in {elapsed:.2f}s "
+          f"({total / elapsed:.0f} requests/s, {created / elapsed:.0f} signups/s)")
+    print(f"{statements / total:.2f} SQL statements per request")
+    if created != args.users or rejected != args.duplicates or without_dashboard:
+        print(f"FAIL: statuses {statuses}, {without_dashboard} user(s) without a dashboard")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
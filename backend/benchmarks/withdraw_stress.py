@@ -0,0 +1,106 @@
+"""Concurrent withdrawal stress test.
+
+Funds one account, fires many parallel POST /withdraw requests whose total
+exceeds the balance, then checks that exactly balance // amount of them
+succeeded, the balance never went negative and the withdrawals add up to
+the debited amount. Prints throughput and exits non-zero on any violation.
+
+Run from backend/ (requires httpx):
+
+    DATABASE_URL=postgresql://... python -m benchmarks.withdraw_stress --requests 500
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import httpx
+from sqlalchemy import delete, func, select, update
+
+os.environ.setdefault("RATE_LIMITING", "off")  # measure the app, not the limiter
+
+from config.database import SessionLocal, engine
+from main import app
+from models.model import Base, Dashboard, User, Withdrawal
+
+EMAIL = "stress@example.com"
+PASSWORD = "bench-password"
+
+
+async def reset_account(balance):
+    async with SessionLocal() as db:
+        user_id = await db.scalar(select(User.id).where(User.email == EMAIL))
+        await db.execute(delete(Withdrawal).where(Withdrawal.user_id == user_id))
+        await db.execute(update(Dashboard).where(Dashboard.user_id == user_id).values(balance=balance))
+        await db.commit()
+    return user_id
+
+
+async def account_state(user_id):
+    async with SessionLocal() as db:
+        balance = await db.scalar(select(Dashboard.balance).where(Dashboard.user_id == user_id))
+        count, total = (await db.execute(
+            select(func.count(Withdrawal.id), func.coalesce(func.sum(Withdrawal.amount), 0.0))
+            .where(Withdrawal.user_id == user_id)
+        )).one()
+    return balance, count, total
+
+
+async def run(args) -> int:
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        await client.post("/auth/signup", json={
+            "username": "stress", "email": EMAIL, "phone_number": "0000", "password": PASSWORD,
+        })
+        response = await client.post("/auth/login", json={"email": EMAIL, "password": PASSWORD})
+        response.raise_for_status()
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        user_id = await reset_account(args.balance)
+
+        semaphore = asyncio.Semaphore(args.concurrency)
+        body = {"method": "easypaisa", "phone_number": "03000000000", "amount": args.amount}
+
+        async def withdraw():
+            async with semaphore:
+                return (await client.post("/withdraw", json=body, headers=headers)).status_code
+
+        started = time.perf_counter()
+        statuses = await asyncio.gather(*(withdraw() for _ in range(args.requests)))
+        elapsed = time.perf_counter() - started
+
+    balance, count, total = await account_state(user_id)
+    await engine.dispose()
+
+    expected = min(args.requests, int(args.balance // args.amount))
+    accepted = statuses.count(200)
+    print(f"{args.requests} requests in {elapsed:.2f}s ({args.requests / elapsed:.1f} req/s)")
+    print(f"accepted={accepted} rejected={statuses.count(400)} other={len(statuses) - accepted - statuses.count(400)}")
+    print(f"final balance={balance:.2f} withdrawals={count} withdrawn={total:.2f}")
+
+    failures = []
+    if balance < 0:
+        failures.append("balance went negative")
+    if accepted != expected or count != expected:
+        failures.append(f"expected {expected} withdrawals")
+    if abs(args.balance - total - balance) > 1e-6:
+        failures.append("withdrawn amount does not match debited balance")
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--balance", type=float, default=1000.0)
+    parser.add_argument("--amount", type=float, default=10.0)
+    sys.exit(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
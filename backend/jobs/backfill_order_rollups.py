@@ -0,0 +1,40 @@
+"""Rebuild the hourly order rollups behind /analytics/orders from orders.
+
+Run from backend/ after the order_rollups migration, and whenever the
+rollups need recomputing:
+
+    python -m jobs.backfill_order_rollups                     # every seller
+    python -m jobs.backfill_order_rollups --user-id 42
+    python -m jobs.backfill_order_rollups --since 2025-01-01  # recent hours only
+
+Rows in scope are deleted and recomputed in one transaction. Orders
+written while it runs are applied by the regular Order hooks, but run it
+in a quiet period for exact results.
+"""
+import argparse
+import asyncio
+import sys
+import time
+from datetime import datetime
+
+from config.database import SessionLocal, engine
+from utils.rollups import backfill_order_rollups
+
+
+async def run(args):
+    started = time.perf_counter()
+    async with SessionLocal() as db:
+        written = await backfill_order_rollups(db, user_id=args.user_id, since=args.since)
+    await engine.dispose()
+    print(f"{written} rollup row(s) written in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--user-id", type=int, help="only this seller")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="only hours from this UTC time on")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
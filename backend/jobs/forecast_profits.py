@@ -0,0 +1,62 @@
+"""Recompute every seller's Dashboard.profit_forecast from their order history.
+
+Run from backend/ (needs numpy: pip install -e ".[forecast]"), e.g. nightly
+from cron after midnight UTC:
+
+    python -m jobs.forecast_profits
+    python -m jobs.forecast_profits --history-days 180 --horizon-days 7
+    python -m jobs.forecast_profits --dry-run  # print forecasts, write nothing
+
+Daily profit comes from the hourly order rollups, so run
+jobs.backfill_order_rollups first if they have never been built, or were
+built before order_rollups.shipping_fee existed; the job refuses to run
+until then.
+"""
+import argparse
+import asyncio
+import logging
+import sys
+import time
+from datetime import datetime
+
+from config.database import SessionLocal, engine
+from utils.dashboard_cache import warn_if_cache_is_local
+from utils.forecast import FORECAST_HISTORY_DAYS, FORECAST_HORIZON_DAYS, refresh_profit_forecasts
+
+
+async def run(args):
+    if not args.dry_run:
+        warn_if_cache_is_local(logging.getLogger("forecast"))
+    started = time.perf_counter()
+    try:
+        async with SessionLocal() as db:
+            user_ids, forecasts, changed = await refresh_profit_forecasts(
+                db, history_days=args.history_days, horizon_days=args.horizon_days,
+                today=args.today, dry_run=args.dry_run,
+            )
+    except ValueError as e:
+        sys.exit(str(e))
+    finally:
+        await engine.dispose()
+    if args.dry_run:
+        for user_id, forecast in zip(user_ids.tolist(), forecasts.tolist()):
+            print(f"{user_id}\t{forecast:.2f}")
+    print(
+        f"{len(user_ids)} forecast(s) computed{'' if args.dry_run else f', {changed} changed'} "
+        f"in {time.perf_counter() - started:.1f}s",
+        file=sys.stderr,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--history-days", type=int, default=FORECAST_HISTORY_DAYS)
+    parser.add_argument("--horizon-days", type=int, default=FORECAST_HORIZON_DAYS)
+    parser.add_argument("--today", type=datetime.fromisoformat,
+                        help="forecast as of this UTC date instead of today")
+    parser.add_argument("--dry-run", action="store_true", help="print forecasts without writing them")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+"""Delete expired idempotency keys.
+
+Run from backend/, e.g. hourly from cron:
+
+    python -m jobs.purge_idempotency_keys
+"""
+import asyncio
+
+from config.database import SessionLocal, engine
+from utils.idempotency import purge_expired_keys
+
+
+async def run():
+    async with SessionLocal() as db:
+        deleted = await purge_expired_keys(db)
+    await engine.dispose()
+    print(f"deleted {deleted} expired idempotency key(s)")
+
+
+def main():
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""Rebuild dashboard order counters from the orders table and report drift.
+
+Run from backend/:
+
+    python -m jobs.reconcile_dashboards            # report and fix
+    python -m jobs.reconcile_dashboards --dry-run  # report only
+
+Prints one JSON line per drifted dashboard and exits with status 1 if any
+drift was found, so it can run from cron and alert.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import sys
+
+from config.database import SessionLocal, engine
+from utils.dashboard_cache import warn_if_cache_is_local
+from utils.aggregates import reconcile_dashboards
+
+
+async def run(args) -> int:
+    if not args.dry_run:
+        warn_if_cache_is_local(logging.getLogger("reconcile"))
+    async with SessionLocal() as db:
+        drift = await reconcile_dashboards(db, fix=not args.dry_run)
+    await engine.dispose()
+    for entry in drift:
+        print(json.dumps(entry, default=str))
+    print(f"{len(drift)} dashboard(s) drifted{'' if args.dry_run else ', fixed'}", file=sys.stderr)
+    return 1 if drift else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dry-run", action="store_true", help="report drift without fixing it")
+    sys.exit(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
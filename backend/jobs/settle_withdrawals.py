@@ -0,0 +1,72 @@
+"""Settlement worker: pays out pending withdrawals in batches.
+
+Run from backend/; start as many processes as needed, they never claim the
+same withdrawal twice:
+
+    python -m jobs.settle_withdrawals --adapter fake
+    python -m jobs.settle_withdrawals --adapter payouts.jazzcash:JazzCashAdapter --batch-size 200
+
+Exits after draining the queue with --once.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import time
+
+from config.database import SessionLocal, engine
+from utils.dashboard_cache import warn_if_cache_is_local
+from utils.payouts import load_adapter
+from utils.settlement import settle_batch
+
+logger = logging.getLogger("settlement")
+
+
+async def run(args):
+    adapter = load_adapter(args.adapter)
+    warn_if_cache_is_local(logger)
+    total = {"completed": 0, "failed": 0, "unsettled": 0}
+    started = time.perf_counter()
+    try:
+        while True:
+            try:
+                async with SessionLocal() as db:
+                    result = await settle_batch(db, adapter, args.batch_size)
+            except Exception:
+                logger.exception("Settlement batch failed; claimed withdrawals are retried "
+                                 "after SETTLEMENT_CLAIM_TIMEOUT")
+                await asyncio.sleep(args.poll_interval)
+                continue
+
+            claimed = sum(result.values())
+            for outcome, count in result.items():
+                total[outcome] += count
+            if claimed:
+                elapsed = time.perf_counter() - started
+                logger.info("settled %(completed)d completed, %(failed)d failed, %(unsettled)d left for retry",
+                            result)
+                done = total["completed"] + total["failed"]
+                logger.info("running total %d in %.1fs (%.1f/s)", done, elapsed, done / elapsed)
+            if claimed < args.batch_size:
+                # Queue drained
+                if args.once:
+                    break
+                await asyncio.sleep(args.poll_interval)
+    finally:
+        await engine.dispose()
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--adapter", default=os.getenv("PAYOUT_ADAPTER", "fake"),
+                        help="'fake' or module:ClassName of a PayoutAdapter")
+    parser.add_argument("--batch-size", type=int, default=int(os.getenv("SETTLEMENT_BATCH_SIZE", 100)))
+    parser.add_argument("--poll-interval", type=float, default=float(os.getenv("SETTLEMENT_POLL_INTERVAL", 2.0)))
+    parser.add_argument("--once", action="store_true", help="exit once no pending withdrawals are left")
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+    print(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
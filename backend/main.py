@@ -1,17 +1,51 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, Header, HTTPException, Query, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta
 from typing import Optional, List
-from utils.pydantic import UserSignup, UserLogin, APIResponse, Token, UserInfo, DashboardData, WithdrawalRequest, WithdrawalResponse, OrderResponse
-from utils.util import get_db, get_current_user, create_access_token, authenticate_user, generate_transaction_id, get_password_hash, verify_password
-from models.model import User, Dashboard, Withdrawal, Order
+from utils.pydantic import UserSignup, UserLogin, APIResponse, Token, UserInfo, DashboardData, DashboardUpdate, SellerDashboardUpdate, WithdrawalRequest, WithdrawalResponse, OrderResponse, BulkOrderResponse, OrderAnalytics
+from utils.util import Principal, get_db, get_current_user, require_admin, create_access_token, generate_transaction_id
+from utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, keyset_page, split_page
+import utils.aggregates  # noqa: F401 - keeps dashboard counters in sync with Order writes
+from utils.dashboard_cache import dashboard_cache, dashboard_etag, etag_matches
+from utils.dashboard_updates import MAX_DASHBOARD_BATCH, upsert_dashboards
+from utils.withdrawals import debit_and_record_withdrawal
+from utils.idempotency import KeyInUse, find_response, remember_response, request_fingerprint, save_response, single_flight, validate_key
+from utils.orders import ingest_orders, read_bulk_rows
+from utils.accounts import create_account
+from utils.rate_limit import charge_failed_login, limit_login, limit_login_account, limit_signup, limit_withdrawal_account, limit_withdrawals
+from utils.rollups import order_analytics
+from utils.export import export_response
+from utils.serialization import RowSerializer
+from utils.instrumentation import MetricsMiddleware, check_metrics_token
+from utils.profiling import PROFILING_ENABLED, ProfilingMiddleware, get_profile, list_profiles
+from utils.query_budget import SQL_QUERY_BUDGET_MODE, QueryBudgetMiddleware, query_budget
+from utils import metrics
+from utils.hashing import hash_password, authenticate_user, shutdown_executor
+from models.model import Dashboard, Withdrawal, Order
+from config.database import engine
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 import os
 
 load_dotenv()  # Load environment variables from .env file
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    shutdown_executor()
+    await engine.dispose()
+
+
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
+
+order_serializer = RowSerializer(OrderResponse)
+withdrawal_serializer = RowSerializer(WithdrawalResponse)
+dashboard_columns = tuple(getattr(Dashboard, name) for name in DashboardData.model_fields)
 
 secret_key = os.getenv("SECRET_KEY")
 
@@ -27,7 +61,13 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "Retry-After"],
 )
+if SQL_QUERY_BUDGET_MODE != "off":
+    app.add_middleware(QueryBudgetMiddleware)
+if PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 
 @app.get("/")
@@ -45,45 +85,55 @@ async def root():
         }
     }
 
+@app.get("/metrics", include_in_schema=False)
+@query_budget(0)
+async def get_metrics(authorization: Optional[str] = Header(None)):
+    check_metrics_token(authorization)
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+@app.get("/admin/profiles", dependencies=[Depends(require_admin)])
+@query_budget(0)
+async def get_profiles():
+    return list_profiles()
+
+@app.get("/admin/profiles/{profile_id}", dependencies=[Depends(require_admin)])
+@query_budget(0)
+async def get_profile_details(profile_id: int):
+    profile = get_profile(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return profile
+
 # Authentication Routes
-@app.post("/auth/signup", response_model=APIResponse)
-async def signup(user_data: UserSignup, db: Session = Depends(get_db)):
-    # Check if user already exists
-    existing_user = db.query(User).filter(
-        (User.username == user_data.username) | (User.email == user_data.email)
-    ).first()
-
-    if existing_user:
+@app.post("/auth/signup", response_model=APIResponse, dependencies=[Depends(limit_signup)])
+@query_budget(2)
+async def signup(user_data: UserSignup, db: AsyncSession = Depends(get_db)):
+    # Hashed before the session touches the database, so no pooled
+    # connection is held while bcrypt runs
+    hashed_password = await hash_password(user_data.password)
+    try:
+        user_id = await create_account(
+            db,
+            username=user_data.username,
+            email=user_data.email,
+            phone_number=user_data.phone_number,
+            hashed_password=hashed_password,
+        )
+    except IntegrityError:
+        await db.rollback()
         raise HTTPException(
             status_code=400,
             detail="Username or email already registered"
         )
 
-    # Hash the password before storing
-    db_user = User(
-        username=user_data.username,
-        email=user_data.email,
-        phone_number=user_data.phone_number,
-        hashed_password=get_password_hash(user_data.password)
-    )
-
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-
-    # Create dashboard entry
-    dashboard = Dashboard(user_id=db_user.id)
-    db.add(dashboard)
-    db.commit()
-
     return APIResponse(
         success=True,
         message="User registered successfully",
-        data={"user_id": db_user.id, "username": db_user.username}
+        data={"user_id": user_id, "username": user_data.username}
     )
 
 # @app.post("/auth/login", response_model=TokenWithUser)
-# async def login(login_data: UserLogin, db: Session = Depends(get_db)):
+# async def login(login_data: UserLogin, db: AsyncSession = Depends(get_db)):
 #     user = db.query(User).filter(User.email == login_data.email).first()
 
 #     if not user or user.hashed_password != login_data.password:
@@ -107,11 +157,14 @@ async def signup(user_data: UserSignup, db: Session = Depends(get_db)):
 #         username=user.username,
 #         email=user.email
     # )
-@app.post("/auth/login", response_model=TokenWithUser)
-async def login(login_data: UserLogin, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == login_data.email).first()
+@app.post("/auth/login", response_model=TokenWithUser, dependencies=[Depends(limit_login)])
+@query_budget(1)
+async def login(request: Request, login_data: UserLogin, db: AsyncSession = Depends(get_db)):
+    await limit_login_account(request, login_data.email)
+    user = await authenticate_user(db, login_data.email, login_data.password)
 
-    if not user or not verify_password(login_data.password, user.hashed_password):
+    if not user:
+        await charge_failed_login(request, login_data.email)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -134,7 +187,8 @@ async def login(login_data: UserLogin, db: Session = Depends(get_db)):
     )
 # User Profile Route
 @app.get("/auth/me", response_model=UserInfo)
-async def get_current_user_info(current_user: User = Depends(get_current_user)):
+@query_budget(1)
+async def get_current_user_info(current_user: Principal = Depends(get_current_user)):
     return UserInfo(
         id=current_user.id,
         username=current_user.username,
@@ -145,90 +199,130 @@ async def get_current_user_info(current_user: User = Depends(get_current_user)):
 
 # Dashboard Routes
 @app.get("/dashboard", response_model=DashboardData)
+@query_budget(4)
 async def get_dashboard(
-    current_user: User = Depends(get_current_user), 
-    db: Session = Depends(get_db)
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    current_user: Principal = Depends(get_current_user), 
+    db: AsyncSession = Depends(get_db)
 ):
-    dashboard = db.query(Dashboard).filter(Dashboard.user_id == current_user.id).first()
-    
-    if not dashboard:
-        # Create dashboard if it doesn't exist
-        dashboard = Dashboard(user_id=current_user.id)
-        db.add(dashboard)
-        db.commit()
-        db.refresh(dashboard)
-    
-    return DashboardData(
-        balance=dashboard.balance,
-        products_sold=dashboard.products_sold,
-        profit=dashboard.profit,
-        total_revenue=dashboard.total_revenue,
-        total_orders=dashboard.total_orders,
-        total_sales=dashboard.total_sales,
-        profit_forecast=dashboard.profit_forecast,
-        shop_followers=dashboard.shop_followers,
-        shop_rating=dashboard.shop_rating,
-        credit_score=dashboard.credit_score,
-        updated_at=dashboard.updated_at
-    )
+    data = await dashboard_cache.get(current_user.id)
+    if data is None:
+        generation = await dashboard_cache.generation(current_user.id)
+        dashboard = (await db.execute(
+            select(*dashboard_columns)
+            .where(Dashboard.user_id == current_user.id)
+        )).first()
+        
+        if not dashboard:
+            # Create dashboard if it doesn't exist
+            dashboard = Dashboard(user_id=current_user.id)
+            db.add(dashboard)
+            await db.commit()
+            await db.refresh(dashboard)
+        
+        data = DashboardData.model_validate(dashboard, from_attributes=True).model_dump(mode="json")
+        await dashboard_cache.set(current_user.id, data, generation)
 
-@app.put("/dashboard/update", response_model=APIResponse)
+    etag = dashboard_etag(datetime.fromisoformat(data["updated_at"]))
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return data
+
+@app.patch("/dashboard", response_model=APIResponse)
+@query_budget(2)
 async def update_dashboard(
-    balance: Optional[float] = None,
-    products_sold: Optional[int] = None,
-    profit: Optional[float] = None,
-    total_revenue: Optional[float] = None,
-    total_orders: Optional[int] = None,
-    total_sales: Optional[float] = None,
-    profit_forecast: Optional[float] = None,
-    shop_followers: Optional[int] = None,
-    shop_rating: Optional[float] = None,
-    credit_score: Optional[int] = None,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    update: DashboardUpdate,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
-    dashboard = db.query(Dashboard).filter(Dashboard.user_id == current_user.id).first()
-    
-    if not dashboard:
-        dashboard = Dashboard(user_id=current_user.id)
-        db.add(dashboard)
-    
-    # Update only provided fields
-    if balance is not None:
-        dashboard.balance = balance
-    if products_sold is not None:
-        dashboard.products_sold = products_sold
-    if profit is not None:
-        dashboard.profit = profit
-    if total_revenue is not None:
-        dashboard.total_revenue = total_revenue
-    if total_orders is not None:
-        dashboard.total_orders = total_orders
-    if total_sales is not None:
-        dashboard.total_sales = total_sales
-    if profit_forecast is not None:
-        dashboard.profit_forecast = profit_forecast
-    if shop_followers is not None:
-        dashboard.shop_followers = shop_followers
-    if shop_rating is not None:
-        dashboard.shop_rating = max(0.0, min(5.0, shop_rating))  # Ensure rating is between 0-5
-    if credit_score is not None:
-        dashboard.credit_score = max(0, min(850, credit_score))  # Ensure credit score is between 0-850
+    fields = update.model_dump(exclude_none=True)
+    rows = await upsert_dashboards(db, {current_user.id: fields}, returning=dashboard_columns)
     
-    dashboard.updated_at = datetime.utcnow()
-    db.commit()
+    return APIResponse(
+        success=True,
+        message="Dashboard updated successfully",
+        data=DashboardData.model_validate(rows[0], from_attributes=True).model_dump(mode="json")
+    )
+
+@app.patch("/admin/dashboards", response_model=APIResponse, dependencies=[Depends(require_admin)])
+@query_budget(None)
+async def update_dashboards(updates: List[SellerDashboardUpdate], db: AsyncSession = Depends(get_db)):
+    if len(updates) > MAX_DASHBOARD_BATCH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_DASHBOARD_BATCH} dashboards per request"
+        )
+    merged = {}
+    for update in updates:
+        # Later entries for the same seller win, field by field, except
+        # balance adjustments, which add up
+        fields = merged.setdefault(update.user_id, {})
+        changes = update.model_dump(exclude={"user_id"}, exclude_none=True)
+        if "balance_adjustment" in changes:
+            changes["balance_adjustment"] += fields.get("balance_adjustment", 0)
+        fields.update(changes)
+    await upsert_dashboards(db, merged)
     
     return APIResponse(
         success=True,
-        message="Dashboard updated successfully"
+        message=f"{len(merged)} dashboard(s) updated",
+        data={"updated": len(merged)}
     )
 
 # Withdrawal Routes
-@app.post("/withdraw", response_model=WithdrawalResponse)
+async def _record_withdrawal(
+    withdrawal_data: WithdrawalRequest,
+    user_id: int,
+    db: AsyncSession,
+    idempotency_key: Optional[str] = None,
+    request_hash: Optional[str] = None,
+) -> WithdrawalResponse:
+    # Debit the balance and record the withdrawal atomically
+    withdrawal = await debit_and_record_withdrawal(
+        db,
+        user_id=user_id,
+        method=withdrawal_data.method.lower(),
+        phone_number=withdrawal_data.phone_number,
+        amount=withdrawal_data.amount,
+        currency=withdrawal_data.currency.upper(),
+        transaction_id=generate_transaction_id(),
+    )
+    if withdrawal is None:
+        raise HTTPException(
+            status_code=400,
+            detail="Insufficient balance for withdrawal"
+        )
+    
+    result = WithdrawalResponse(
+        id=withdrawal.id,
+        method=withdrawal.method,
+        phone_number=withdrawal.phone_number,
+        amount=withdrawal.amount,
+        currency=withdrawal.currency,
+        status=withdrawal.status,
+        transaction_id=withdrawal.transaction_id,
+        created_at=withdrawal.created_at
+    )
+    if idempotency_key is not None:
+        expires_at = await save_response(db, user_id, idempotency_key, request_hash, result.model_dump(mode="json"))
+    
+    await db.commit()
+    await dashboard_cache.delete(user_id)
+    if idempotency_key is not None:
+        remember_response(user_id, idempotency_key, request_hash, result.model_dump(mode="json"), expires_at)
+    return result
+
+@app.post("/withdraw", response_model=WithdrawalResponse, dependencies=[Depends(limit_withdrawals)])
+@query_budget(5)
 async def create_withdrawal(
     withdrawal_data: WithdrawalRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    response: Response,
+    idempotency_key: Optional[str] = Header(None),
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     # Validate withdrawal method
     if withdrawal_data.method.lower() not in ["easypaisa", "jazzcash"]:
@@ -244,96 +338,167 @@ async def create_withdrawal(
             detail="Withdrawal amount must be greater than 0"
         )
     
-    # Check user balance
-    dashboard = db.query(Dashboard).filter(Dashboard.user_id == current_user.id).first()
-    if not dashboard or dashboard.balance < withdrawal_data.amount:
-        raise HTTPException(
-            status_code=400,
-            detail="Insufficient balance for withdrawal"
-        )
-    
-    # Create withdrawal record
-    transaction_id = generate_transaction_id()
-    withdrawal = Withdrawal(
-        user_id=current_user.id,
-        method=withdrawal_data.method.lower(),
-        phone_number=withdrawal_data.phone_number,
-        amount=withdrawal_data.amount,
-        currency=withdrawal_data.currency.upper(),
-        transaction_id=transaction_id
-    )
-    
-    db.add(withdrawal)
-    
-    # Update user balance
-    dashboard.balance -= withdrawal_data.amount
-    dashboard.updated_at = datetime.utcnow()
+    if idempotency_key is None:
+        await limit_withdrawal_account(current_user.id)
+        return await _record_withdrawal(withdrawal_data, current_user.id, db)
     
-    db.commit()
-    db.refresh(withdrawal)
+    # Replays of a key get the original response without debiting again
+    validate_key(idempotency_key)
+    request_hash = request_fingerprint(withdrawal_data)
+    async with single_flight(current_user.id, idempotency_key):
+        stored = await find_response(db, current_user.id, idempotency_key, request_hash)
+        if stored is None:
+            await limit_withdrawal_account(current_user.id)
+            try:
+                return await _record_withdrawal(
+                    withdrawal_data, current_user.id, db, idempotency_key, request_hash
+                )
+            except (IntegrityError, KeyInUse):
+                # Another worker committed this key first; roll our debit
+                # back and replay its response
+                await db.rollback()
+                stored = await find_response(db, current_user.id, idempotency_key, request_hash)
+                if stored is None:
+                    raise HTTPException(
+                        status_code=status.HTTP_409_CONFLICT,
+                        detail="A request with this Idempotency-Key is in progress, please retry"
+                    )
     
-    return WithdrawalResponse(
-        id=withdrawal.id,
-        method=withdrawal.method,
-        phone_number=withdrawal.phone_number,
-        amount=withdrawal.amount,
-        currency=withdrawal.currency,
-        status=withdrawal.status,
-        transaction_id=withdrawal.transaction_id,
-        created_at=withdrawal.created_at
-    )
+    response.headers["Idempotent-Replayed"] = "true"
+    return WithdrawalResponse(**stored)
 
 @app.get("/withdraw/history", response_model=List[WithdrawalResponse])
+@query_budget(2)
 async def get_withdrawal_history(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    withdrawal_status: Optional[str] = Query(None, alias="status"),
+    method: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
-    withdrawals = db.query(Withdrawal).filter(
-        Withdrawal.user_id == current_user.id
-    ).order_by(Withdrawal.created_at.desc()).all()
+    query = select(*withdrawal_serializer.columns(Withdrawal)).where(Withdrawal.user_id == current_user.id)
+    if withdrawal_status:
+        query = query.where(Withdrawal.status == withdrawal_status.lower())
+    if method:
+        query = query.where(Withdrawal.method == method.lower())
+    if created_from:
+        query = query.where(Withdrawal.created_at >= created_from)
+    if created_to:
+        query = query.where(Withdrawal.created_at < created_to)
+
+    withdrawals = (await db.execute(keyset_page(query, Withdrawal, cursor, limit))).all()
+    withdrawals, next_cursor = split_page(withdrawals, limit)
     
-    return [
-        WithdrawalResponse(
-            id=w.id,
-            method=w.method,
-            phone_number=w.phone_number,
-            amount=w.amount,
-            currency=w.currency,
-            status=w.status,
-            transaction_id=w.transaction_id,
-            created_at=w.created_at
-        ) for w in withdrawals
-    ]
+    return withdrawal_serializer.list_response(
+        withdrawals, headers={NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+    )
+
+@app.get("/withdraw/export")
+@query_budget(2)
+async def export_withdrawals(
+    format: str = "csv",
+    gzip: bool = False,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    current_user: Principal = Depends(get_current_user),
+):
+    query = select(
+        Withdrawal.id, Withdrawal.method, Withdrawal.phone_number, Withdrawal.amount,
+        Withdrawal.currency, Withdrawal.status, Withdrawal.transaction_id,
+        Withdrawal.created_at, Withdrawal.processed_at,
+    ).where(Withdrawal.user_id == current_user.id)
+    if created_from:
+        query = query.where(Withdrawal.created_at >= created_from)
+    if created_to:
+        query = query.where(Withdrawal.created_at < created_to)
+    return export_response(query.order_by(Withdrawal.created_at, Withdrawal.id), "withdrawals", format, gzip)
 
 @app.get("/withdraw/{withdrawal_id}", response_model=WithdrawalResponse)
+@query_budget(2)
 async def get_withdrawal_details(
     withdrawal_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
-    withdrawal = db.query(Withdrawal).filter(
+    withdrawal = (await db.execute(select(*withdrawal_serializer.columns(Withdrawal)).where(
         Withdrawal.id == withdrawal_id,
         Withdrawal.user_id == current_user.id
-    ).first()
+    ))).first()
     
     if not withdrawal:
         raise HTTPException(status_code=404, detail="Withdrawal not found")
     
-    return WithdrawalResponse(
-        id=withdrawal.id,
-        method=withdrawal.method,
-        phone_number=withdrawal.phone_number,
-        amount=withdrawal.amount,
-        currency=withdrawal.currency,
-        status=withdrawal.status,
-        transaction_id=withdrawal.transaction_id,
-        created_at=withdrawal.created_at
-    )
+    return withdrawal_serializer.item_response(withdrawal)
 
 @app.get("/order", response_model=List[OrderResponse])
 @app.get("/orders", response_model=List[OrderResponse])
-def get_my_orders(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+@query_budget(2)
+async def get_my_orders(
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    order_status: Optional[str] = Query(None, alias="status"),
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    query = select(*order_serializer.columns(Order)).where(Order.user_id == current_user.id)
+    if order_status:
+        query = query.where(Order.status == order_status.lower())
+    if created_from:
+        query = query.where(Order.created_at >= created_from)
+    if created_to:
+        query = query.where(Order.created_at < created_to)
+
+    orders = (await db.execute(keyset_page(query, Order, cursor, limit))).all()
+    orders, next_cursor = split_page(orders, limit)
+    return order_serializer.list_response(
+        orders, headers={NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+    )
+
+@app.post("/orders/bulk", response_model=BulkOrderResponse)
+@query_budget(None)
+async def bulk_upsert_orders(
+    request: Request,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    # Body is a JSON array of orders, or NDJSON (one order per line) when
+    # sent as application/x-ndjson
+    return await ingest_orders(db, current_user.id, read_bulk_rows(request))
+
+@app.get("/orders/export")
+@query_budget(2)
+async def export_orders(
+    format: str = "csv",
+    gzip: bool = False,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    current_user: Principal = Depends(get_current_user),
+):
+    query = select(
+        Order.id, Order.order_number, Order.status, Order.currency, Order.item_count,
+        Order.subtotal, Order.discount, Order.tax, Order.shipping_fee, Order.total,
+        Order.created_at, Order.paid_at, Order.fulfilled_at, Order.cancelled_at,
+    ).where(Order.user_id == current_user.id)
+    if created_from:
+        query = query.where(Order.created_at >= created_from)
+    if created_to:
+        query = query.where(Order.created_at < created_to)
+    return export_response(query.order_by(Order.created_at, Order.id), "orders", format, gzip)
+
+@app.get("/analytics/orders", response_model=OrderAnalytics)
+@query_budget(2)
+async def get_order_analytics(
+    granularity: str = "day",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
-    return db.query(Order).filter(Order.user_id == current_user.id).all()
\ No newline at end of file
+    end = end or datetime.utcnow()
+    start = start or end - timedelta(days=30)
+    return await order_analytics(db, current_user.id, granularity, start, end)
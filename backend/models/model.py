@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, ForeignKey, Index, Text, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import  relationship
 from datetime import datetime, timedelta
@@ -51,15 +51,32 @@ class Withdrawal(Base):
     phone_number = Column(String(20), nullable=False)
     amount = Column(Float, nullable=False)
     currency = Column(String(5), default="PKR")
-    status = Column(String(20), default="pending")  # pending, completed, failed, cancelled
+    status = Column(String(20), default="pending")  # pending, processing, completed, failed, cancelled
     transaction_id = Column(String(50), unique=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+    claimed_at = Column(DateTime, nullable=True)  # when a settlement worker last claimed it
     processed_at = Column(DateTime, nullable=True)
     
     # Relationship
     user = relationship("User", back_populates="withdrawals")
 
 
+# Backs keyset pagination of a user's withdrawal history, newest first
+Index(
+    "ix_withdrawals_user_id_created_at_id",
+    Withdrawal.user_id, Withdrawal.created_at.desc(), Withdrawal.id.desc(),
+)
+
+# Lets the settlement worker find unsettled withdrawals without scanning
+# settled ones
+Index(
+    "ix_withdrawals_unsettled_id",
+    Withdrawal.id,
+    postgresql_where=Withdrawal.status.in_(("pending", "processing")),
+    sqlite_where=Withdrawal.status.in_(("pending", "processing")),
+)
+
+
 
 class Order(Base):
     __tablename__ = "orders"
@@ -71,6 +88,7 @@ class Order(Base):
     order_number = Column(String(40), unique=True, nullable=False, index=True)
     status = Column(String(20), default="pending")  # pending, paid, shipped, delivered, cancelled, refunded
     currency = Column(String(5), default="PKR")
+    item_count = Column(Integer, default=1, nullable=False)
     
     # Financials
     subtotal = Column(Float, default=0.0, nullable=False)
@@ -88,4 +106,40 @@ class Order(Base):
 
     user = relationship("User", back_populates="orders")
 
-    
\ No newline at end of file
+    __table_args__ = (
+        # Backs keyset pagination of a seller's orders on (created_at, id)
+        Index("ix_orders_user_id_created_at_id", "user_id", "created_at", "id"),
+    )
+
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    key = Column(String(255), nullable=False)
+    request_hash = Column(String(64), nullable=False)  # sha256 of the request body
+    response = Column(Text, nullable=False)  # JSON of the original response
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "key", name="uq_idempotency_keys_user_id_key"),
+    )
+
+
+class OrderRollup(Base):
+    """Hourly per-seller order totals, maintained from Order writes."""
+    __tablename__ = "order_rollups"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    bucket_start = Column(DateTime, primary_key=True)  # UTC, truncated to the hour
+
+    order_count = Column(Integer, default=0, nullable=False)
+    item_count = Column(Integer, default=0, nullable=False)
+    revenue = Column(Float, default=0.0, nullable=False)
+    discount = Column(Float, default=0.0, nullable=False)
+    tax = Column(Float, default=0.0, nullable=False)
+    shipping_fee = Column(Float, default=0.0)  # NULL on hours from before the column, until backfilled
+    refund_count = Column(Integer, default=0, nullable=False)
+    refunds = Column(Float, default=0.0, nullable=False)
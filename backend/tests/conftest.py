@@ -0,0 +1,87 @@
+import os
+import tempfile
+import uuid
+from dataclasses import dataclass
+from typing import Dict
+
+# Settings are read when the app is imported, so they are set first. Every
+# test runs against a scratch SQLite database, with query budgets enforced.
+ADMIN_TOKEN = "test-admin-token"
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'test.db')}"
+os.environ["SECRET_KEY"] = "test-secret-key"
+os.environ["ADMIN_TOKEN"] = ADMIN_TOKEN
+os.environ["SQL_QUERY_BUDGET_MODE"] = "raise"
+os.environ["RATE_LIMITING"] = "off"
+
+import pytest
+from fastapi.testclient import TestClient
+
+from config.database import SessionLocal, engine
+from main import app
+from models.model import Base
+
+
+@dataclass
+class Seller:
+    id: int
+    username: str
+    headers: Dict[str, str]
+
+
+async def _create_tables():
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+
+
+@pytest.fixture(scope="session")
+def client():
+    # One app and one database for the session; tests stay independent by
+    # creating their own sellers
+    with TestClient(app) as client:
+        client.portal.call(_create_tables)
+        yield client
+        client.portal.call(engine.dispose)
+
+
+@pytest.fixture
+def in_db(client):
+    """Run `fn(session)` on the app's event loop and return its result."""
+    def run(fn):
+        async def call():
+            async with SessionLocal() as db:
+                return await fn(db)
+        return client.portal.call(call)
+    return run
+
+
+@pytest.fixture
+def make_seller(client):
+    def make(balance: float = 0.0) -> Seller:
+        username = f"seller-{uuid.uuid4().hex[:12]}"
+        email = f"{username}@example.com"
+        response = client.post("/auth/signup", json={
+            "username": username, "email": email, "phone_number": "03001234567", "password": "password",
+        })
+        assert response.status_code == 200, response.text
+        user_id = response.json()["data"]["user_id"]
+        token = client.post("/auth/login", json={"email": email, "password": "password"}).json()["access_token"]
+        if balance:
+            credit(client, user_id, balance)
+        return Seller(user_id, username, {"Authorization": f"Bearer {token}"})
+    return make
+
+
+def credit(client, user_id: int, amount: float):
+    response = client.patch(
+        "/admin/dashboards", json=[{"user_id": user_id, "balance_adjustment": amount}],
+        headers={"X-Admin-Token": ADMIN_TOKEN},
+    )
+    assert response.status_code == 200, response.text
+
+
+def balance(client, seller: Seller) -> float:
+    return client.get("/dashboard", headers=seller.headers).json()["balance"]
+
+
+def withdrawal(amount: float, method: str = "easypaisa") -> Dict:
+    return {"method": method, "phone_number": "03001234567", "amount": amount}
@@ -0,0 +1,63 @@
+from conftest import ADMIN_TOKEN, balance, credit
+
+
+def test_patch_clamps_rating_and_credit_score(client, make_seller):
+    seller = make_seller()
+
+    response = client.patch("/dashboard", json={"shop_rating": 9, "credit_score": -5}, headers=seller.headers)
+
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert data["shop_rating"] == 5.0
+    assert data["credit_score"] == 0
+    assert client.get("/dashboard", headers=seller.headers).json()["shop_rating"] == 5.0
+
+
+def test_patch_leaves_omitted_fields_alone(client, make_seller):
+    seller = make_seller()
+    client.patch("/dashboard", json={"shop_followers": 12}, headers=seller.headers)
+
+    response = client.patch("/dashboard", json={"credit_score": 700}, headers=seller.headers)
+
+    assert response.json()["data"]["shop_followers"] == 12
+    assert response.json()["data"]["credit_score"] == 700
+
+
+def test_patch_rejects_balance_and_unknown_fields(client, make_seller):
+    seller = make_seller(balance=10)
+
+    assert client.patch("/dashboard", json={"balance": 1_000_000}, headers=seller.headers).status_code == 422
+    assert client.patch("/dashboard", json={"bogus": 1}, headers=seller.headers).status_code == 422
+    assert balance(client, seller) == 10
+
+
+def test_admin_balance_adjustments_add_up(client, make_seller):
+    seller = make_seller(balance=100)
+
+    response = client.patch(
+        "/admin/dashboards",
+        json=[
+            {"user_id": seller.id, "balance_adjustment": 25},
+            {"user_id": seller.id, "balance_adjustment": -5, "credit_score": 900},
+        ],
+        headers={"X-Admin-Token": ADMIN_TOKEN},
+    )
+
+    assert response.status_code == 200
+    dashboard = client.get("/dashboard", headers=seller.headers).json()
+    assert dashboard["balance"] == 120
+    assert dashboard["credit_score"] == 850
+
+
+def test_admin_batch_needs_the_admin_token(client, make_seller):
+    seller = make_seller()
+
+    response = client.patch(
+        "/admin/dashboards", json=[{"user_id": seller.id, "balance_adjustment": 10}],
+        headers={"X-Admin-Token": "wrong"},
+    )
+
+    assert response.status_code == 403
+    assert balance(client, seller) == 0
+    credit(client, seller.id, 10)
+    assert balance(client, seller) == 10
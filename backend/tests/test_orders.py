@@ -0,0 +1,69 @@
+import asyncio
+
+import httpx
+from sqlalchemy import func, select
+
+from main import app
+from models.model import OrderRollup
+from utils.aggregates import reconcile_dashboards
+
+
+def orders(prefix, count, total=100.0):
+    return [
+        {"order_number": f"{prefix}-{i}", "status": "paid", "item_count": 2, "total": total,
+         "tax": 10.0, "shipping_fee": 5.0, "created_at": "2026-10-01T12:00:00"}
+        for i in range(count)
+    ]
+
+
+def test_bulk_upload_counts_each_order_once(client, make_seller):
+    seller = make_seller()
+    batch = orders(seller.username, 3)
+    client.post("/orders/bulk", json=batch, headers=seller.headers)
+
+    response = client.post("/orders/bulk", json=batch, headers=seller.headers)
+
+    assert response.json()["updated"] == 3
+    dashboard = client.get("/dashboard", headers=seller.headers).json()
+    assert dashboard["total_orders"] == 3
+    assert dashboard["products_sold"] == 6
+    assert dashboard["profit"] == 255.0
+
+
+def test_overlapping_bulk_uploads_keep_counters_exact(client, make_seller, in_db):
+    seller = make_seller()
+    first, second = orders(seller.username, 50), orders(seller.username, 50, total=200.0)
+
+    async def upload_both():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as http:
+            return await asyncio.gather(
+                http.post("/orders/bulk", json=first, headers=seller.headers),
+                http.post("/orders/bulk", json=second, headers=seller.headers),
+            )
+
+    responses = client.portal.call(upload_both)
+
+    assert [response.status_code for response in responses] == [200, 200]
+    results = [response.json() for response in responses]
+    assert sum(result["created"] for result in results) == 50
+    assert sum(result["updated"] for result in results) == 50
+    dashboard = client.get("/dashboard", headers=seller.headers).json()
+    assert dashboard["total_orders"] == 50
+    drift = in_db(lambda db: reconcile_dashboards(db, fix=False))
+    assert seller.id not in {entry["user_id"] for entry in drift}
+    rolled_up = in_db(lambda db: db.scalar(
+        select(func.sum(OrderRollup.order_count)).where(OrderRollup.user_id == seller.id)
+    ))
+    assert rolled_up == 50
+
+
+def test_bulk_upload_cannot_take_over_another_sellers_order(client, make_seller):
+    owner, other = make_seller(), make_seller()
+    batch = orders(owner.username, 1)
+    client.post("/orders/bulk", json=batch, headers=owner.headers)
+
+    response = client.post("/orders/bulk", json=batch, headers=other.headers).json()
+
+    assert response["failed"] == 1
+    assert response["results"][0]["error"] == "order_number belongs to another seller"
+    assert client.get("/dashboard", headers=other.headers).json()["total_orders"] == 0
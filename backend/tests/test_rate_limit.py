@@ -0,0 +1,53 @@
+import httpx
+
+from conftest import withdrawal
+from main import app
+from utils import rate_limit
+from utils.rate_limit import Rate
+
+
+def login_from(client, ip, email, password):
+    async def call():
+        transport = httpx.ASGITransport(app=app, client=(ip, 1234))
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            response = await http.post("/auth/login", json={"email": email, "password": password})
+            return response.status_code
+    return client.portal.call(call)
+
+
+def enable(monkeypatch, **limits):
+    monkeypatch.setattr(rate_limit, "RATE_LIMITING_ENABLED", True)
+    for name, value in limits.items():
+        monkeypatch.setattr(rate_limit, name, Rate.parse(value))
+
+
+def test_failed_logins_from_many_ips_lock_the_account(client, make_seller, monkeypatch):
+    email = f"{make_seller().username}@example.com"
+    enable(monkeypatch, LOGIN_PER_ACCOUNT="3/3600", LOGIN_PER_ACCOUNT_IP="2/3600")
+
+    assert [login_from(client, "10.0.0.1", email, "wrong") for _ in range(3)] == [401, 401, 429]
+    assert login_from(client, "10.0.0.2", email, "wrong") == 401
+    assert login_from(client, "10.0.0.3", email, "wrong") == 429
+    assert login_from(client, "10.0.0.4", email, "password") == 429
+
+
+def test_successful_logins_are_not_charged(client, make_seller, monkeypatch):
+    email = f"{make_seller().username}@example.com"
+    enable(monkeypatch, LOGIN_PER_ACCOUNT="1/3600", LOGIN_PER_ACCOUNT_IP="1/3600")
+
+    assert [login_from(client, "10.0.1.1", email, "password") for _ in range(3)] == [200, 200, 200]
+
+
+def test_idempotent_replays_are_not_charged_to_the_account(client, make_seller, monkeypatch):
+    seller = make_seller(balance=100)
+    enable(monkeypatch, WITHDRAW_PER_ACCOUNT="1/3600")
+    headers = {**seller.headers, "Idempotency-Key": "limited-1"}
+
+    first = client.post("/withdraw", json=withdrawal(10), headers=headers)
+    replays = [client.post("/withdraw", json=withdrawal(10), headers=headers) for _ in range(3)]
+    another = client.post("/withdraw", json=withdrawal(10), headers=seller.headers)
+
+    assert first.status_code == 200
+    assert [replay.status_code for replay in replays] == [200, 200, 200]
+    assert all(replay.json()["id"] == first.json()["id"] for replay in replays)
+    assert another.status_code == 429
@@ -0,0 +1,62 @@
+from sqlalchemy import select
+
+from conftest import balance, withdrawal
+from models.model import Withdrawal
+from utils import settlement
+from utils.payouts import FakePayoutAdapter, PayoutAdapter
+from utils.settlement import settle_batch
+
+
+class BrokenAdapter(PayoutAdapter):
+    async def send_batch(self, method, withdrawals):
+        raise ConnectionError("provider unreachable")
+
+
+def statuses(in_db, seller):
+    return in_db(lambda db: db.scalars(
+        select(Withdrawal.status).where(Withdrawal.user_id == seller.id).order_by(Withdrawal.id)
+    )).all()
+
+
+def test_successful_payouts_complete(client, make_seller, in_db):
+    seller = make_seller(balance=100)
+    client.post("/withdraw", json=withdrawal(30), headers=seller.headers)
+    client.post("/withdraw", json=withdrawal(20, method="jazzcash"), headers=seller.headers)
+
+    in_db(lambda db: settle_batch(db, FakePayoutAdapter(), batch_size=1000))
+
+    assert statuses(in_db, seller) == ["completed", "completed"]
+    assert balance(client, seller) == 50
+
+
+def test_failed_payouts_are_refunded(client, make_seller, in_db):
+    seller = make_seller(balance=100)
+    client.post("/withdraw", json=withdrawal(30), headers=seller.headers)
+    client.post("/withdraw", json=withdrawal(20), headers=seller.headers)
+    assert balance(client, seller) == 50
+
+    in_db(lambda db: settle_batch(db, FakePayoutAdapter(failure_rate=1.0), batch_size=1000))
+
+    assert statuses(in_db, seller) == ["failed", "failed"]
+    assert balance(client, seller) == 100
+
+
+def test_payout_error_leaves_withdrawals_claimed_until_timeout(client, make_seller, in_db, monkeypatch):
+    seller = make_seller(balance=100)
+    client.post("/withdraw", json=withdrawal(30), headers=seller.headers)
+
+    result = in_db(lambda db: settle_batch(db, BrokenAdapter(), batch_size=1000))
+
+    assert result["unsettled"] >= 1
+    assert statuses(in_db, seller) == ["processing"]
+    assert balance(client, seller) == 70
+    # Still claimed: another worker doesn't pick it up yet
+    adapter = FakePayoutAdapter()
+    in_db(lambda db: settle_batch(db, adapter, batch_size=1000))
+    assert statuses(in_db, seller) == ["processing"]
+
+    monkeypatch.setattr(settlement, "SETTLEMENT_CLAIM_TIMEOUT", 0)
+    in_db(lambda db: settle_batch(db, adapter, batch_size=1000))
+
+    assert statuses(in_db, seller) == ["completed"]
+    assert balance(client, seller) == 70
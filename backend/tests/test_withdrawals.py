@@ -0,0 +1,88 @@
+import asyncio
+
+import httpx
+from sqlalchemy import func, select
+
+from conftest import balance, withdrawal
+from main import app
+from models.model import Withdrawal
+from utils import idempotency
+
+
+def test_withdrawal_debits_balance(client, make_seller):
+    seller = make_seller(balance=100)
+
+    response = client.post("/withdraw", json=withdrawal(30), headers=seller.headers)
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "pending"
+    assert balance(client, seller) == 70
+
+
+def test_withdrawal_over_balance_is_rejected(client, make_seller, in_db):
+    seller = make_seller(balance=50)
+
+    response = client.post("/withdraw", json=withdrawal(80), headers=seller.headers)
+
+    assert response.status_code == 400
+    assert balance(client, seller) == 50
+    count = in_db(lambda db: db.scalar(select(func.count(Withdrawal.id)).where(Withdrawal.user_id == seller.id)))
+    assert count == 0
+
+
+def test_concurrent_withdrawals_never_overdraw(client, make_seller):
+    seller = make_seller(balance=100)
+
+    async def race():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as http:
+            return await asyncio.gather(*(
+                http.post("/withdraw", json=withdrawal(15), headers=seller.headers) for _ in range(10)
+            ))
+
+    statuses = [response.status_code for response in client.portal.call(race)]
+
+    assert statuses.count(200) == 6
+    assert statuses.count(400) == 4
+    assert balance(client, seller) == 10
+
+
+def test_idempotent_replay_returns_the_original_withdrawal(client, make_seller):
+    seller = make_seller(balance=100)
+    headers = {**seller.headers, "Idempotency-Key": "replay-1"}
+
+    first = client.post("/withdraw", json=withdrawal(25), headers=headers)
+    replay = client.post("/withdraw", json=withdrawal(25), headers=headers)
+
+    assert first.status_code == replay.status_code == 200
+    assert replay.json() == first.json()
+    assert replay.headers["Idempotent-Replayed"] == "true"
+    assert balance(client, seller) == 75
+
+
+def test_idempotency_key_reused_with_another_body_is_rejected(client, make_seller):
+    seller = make_seller(balance=100)
+    headers = {**seller.headers, "Idempotency-Key": "mismatch-1"}
+    client.post("/withdraw", json=withdrawal(25), headers=headers)
+
+    response = client.post("/withdraw", json=withdrawal(40), headers=headers)
+
+    assert response.status_code == 422
+    assert balance(client, seller) == 75
+
+
+def test_expired_idempotency_key_can_be_reused(client, make_seller, monkeypatch):
+    seller = make_seller(balance=100)
+    headers = {**seller.headers, "Idempotency-Key": "expiring-1"}
+    # Saved already expired, as if its TTL had passed
+    monkeypatch.setattr(idempotency, "IDEMPOTENCY_KEY_TTL_SECONDS", 0)
+    first = client.post("/withdraw", json=withdrawal(25), headers=headers)
+    monkeypatch.undo()
+
+    reused = client.post("/withdraw", json=withdrawal(25), headers=headers)
+    replay = client.post("/withdraw", json=withdrawal(25), headers=headers)
+
+    assert reused.status_code == 200
+    assert reused.json()["id"] != first.json()["id"]
+    assert "Idempotent-Replayed" not in reused.headers
+    assert replay.json()["id"] == reused.json()["id"]
+    assert balance(client, seller) == 50
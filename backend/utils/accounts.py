@@ -0,0 +1,30 @@
+from datetime import datetime
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.model import Dashboard, User
+
+
+async def create_account(db: AsyncSession, username: str, email: str, phone_number: str,
+                         hashed_password: str) -> int:
+    """Insert a user and their empty dashboard in one transaction; returns the user id.
+
+    Duplicates are left to the unique indexes on username and email, so a
+    taken name raises IntegrityError rather than costing a lookup first. On
+    PostgreSQL both rows are written by one statement, the user insert
+    feeding the dashboard insert as a CTE.
+    """
+    users, dashboards = User.__table__, Dashboard.__table__
+    new_user = insert(users).values(
+        username=username, email=email, phone_number=phone_number,
+        hashed_password=hashed_password, is_active=True, created_at=datetime.utcnow(),
+    )
+    if db.bind.dialect.name == "postgresql":
+        created = new_user.returning(users.c.id).cte("new_user")
+        user_id = await db.scalar(
+            insert(dashboards).from_select(["user_id"], select(created.c.id)).returning(dashboards.c.user_id)
+        )
+    else:
+        user_id = await db.scalar(new_user.returning(users.c.id))
+        await db.execute(insert(dashboards).values(user_id=user_id))
+    await db.commit()
+    return user_id
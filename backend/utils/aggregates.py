@@ -0,0 +1,217 @@
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List
+from sqlalchemy import case, event, exists, func, inspect, insert, or_, select, update
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import object_session
+from models.model import Dashboard, Order
+from utils.dashboard_cache import invalidate_dashboards, mark_dashboards_dirty
+from utils.sql import is_serialization_failure, upsert
+
+
+# Dashboard order counters are maintained incrementally: every Order write
+# applies the difference between the order's new and old contribution to its
+# seller's dashboard row, in the same transaction as the order itself.
+
+# Orders in these statuses count towards revenue; pending, cancelled and
+# refunded orders contribute nothing.
+COUNTED_STATUSES = ("paid", "shipped", "delivered")
+
+# Dashboard columns derived from orders
+ORDER_COUNTERS = ("total_orders", "products_sold", "total_revenue", "profit")
+
+_TRACKED_ATTRIBUTES = ("user_id", "status", "item_count", "total", "tax", "shipping_fee")
+
+
+def order_contribution(status, item_count, total, tax, shipping_fee) -> Dict[str, float]:
+    """What a single order adds to its seller's dashboard counters."""
+    if status not in COUNTED_STATUSES:
+        return dict.fromkeys(ORDER_COUNTERS, 0)
+    return {
+        "total_orders": 1,
+        "products_sold": item_count or 0,
+        "total_revenue": total or 0.0,
+        # Tax and shipping are passed through, not earned
+        "profit": (total or 0.0) - (tax or 0.0) - (shipping_fee or 0.0),
+    }
+
+
+def _contribution_of(values: Dict) -> Dict[str, float]:
+    return order_contribution(*(values[name] for name in _TRACKED_ATTRIBUTES[1:]))
+
+
+def accumulate(deltas: Dict[int, Dict[str, float]], user_id: int, contribution: Dict[str, float], sign: int = 1):
+    totals = deltas[user_id]
+    for counter, value in contribution.items():
+        totals[counter] = totals.get(counter, 0) + sign * value
+
+
+def new_deltas() -> Dict[int, Dict[str, float]]:
+    return defaultdict(dict)
+
+
+def apply_dashboard_deltas(connection, deltas: Dict[int, Dict[str, float]]):
+    """Add per-seller counter deltas to their dashboard rows.
+
+    Runs on a sync Connection so it can be used from ORM flush events and,
+    through AsyncConnection.run_sync, from async code.
+    """
+    now = datetime.utcnow()
+    for user_id, counters in deltas.items():
+        counters = {name: value for name, value in counters.items() if value}
+        if not counters:
+            continue
+        result = connection.execute(
+            update(Dashboard)
+            .where(Dashboard.user_id == user_id)
+            .values(
+                updated_at=now,
+                **{name: func.coalesce(getattr(Dashboard, name), 0) + value
+                   for name, value in counters.items()},
+            )
+        )
+        if result.rowcount == 0:
+            connection.execute(insert(Dashboard).values(user_id=user_id, updated_at=now, **counters))
+
+
+def _current_values(order: Order) -> Dict:
+    return {name: getattr(order, name) for name in _TRACKED_ATTRIBUTES}
+
+
+def _previous_values(order: Order) -> Dict:
+    state = inspect(order)
+    values = {}
+    for name in _TRACKED_ATTRIBUTES:
+        history = state.attrs[name].history
+        values[name] = history.deleted[0] if history.deleted else getattr(order, name)
+    return values
+
+
+@event.listens_for(Order, "after_insert")
+def _order_inserted(mapper, connection, target):
+    deltas = new_deltas()
+    accumulate(deltas, target.user_id, _contribution_of(_current_values(target)))
+    apply_dashboard_deltas(connection, deltas)
+    mark_dashboards_dirty(object_session(target), deltas)
+
+
+@event.listens_for(Order, "after_update")
+def _order_updated(mapper, connection, target):
+    old, new = _previous_values(target), _current_values(target)
+    if old == new:
+        return
+    deltas = new_deltas()
+    accumulate(deltas, old["user_id"], _contribution_of(old), sign=-1)
+    accumulate(deltas, new["user_id"], _contribution_of(new))
+    apply_dashboard_deltas(connection, deltas)
+    mark_dashboards_dirty(object_session(target), deltas)
+
+
+@event.listens_for(Order, "after_delete")
+def _order_deleted(mapper, connection, target):
+    deltas = new_deltas()
+    accumulate(deltas, target.user_id, _contribution_of(_previous_values(target)), sign=-1)
+    apply_dashboard_deltas(connection, deltas)
+    mark_dashboards_dirty(object_session(target), deltas)
+
+
+def _order_totals_query():
+    counted = Order.status.in_(COUNTED_STATUSES)
+    return select(
+        Order.user_id,
+        func.count(case((counted, Order.id))).label("total_orders"),
+        func.coalesce(func.sum(case((counted, Order.item_count), else_=0)), 0).label("products_sold"),
+        func.coalesce(func.sum(case((counted, Order.total), else_=0.0)), 0.0).label("total_revenue"),
+        func.coalesce(func.sum(case(
+            (counted, Order.total - Order.tax - Order.shipping_fee), else_=0.0
+        )), 0.0).label("profit"),
+    ).group_by(Order.user_id)
+
+
+def _drifted_dashboards(tolerance: float):
+    """Dashboards whose stored counters differ from the orders, with both."""
+    totals = _order_totals_query().subquery()
+    stored = {name: getattr(Dashboard, name) for name in ORDER_COUNTERS}
+    expected = {name: func.coalesce(totals.c[name], 0) for name in ORDER_COUNTERS}
+    return (
+        select(
+            Dashboard.user_id,
+            *(column.label(f"stored_{name}") for name, column in stored.items()),
+            *(column.label(name) for name, column in expected.items()),
+        )
+        .outerjoin(totals, totals.c.user_id == Dashboard.user_id)
+        .where(or_(*(
+            func.abs(func.coalesce(stored[name], 0) - expected[name]) > tolerance for name in ORDER_COUNTERS
+        )))
+    )
+
+
+def _missing_dashboards():
+    totals = _order_totals_query().subquery()
+    return select(totals).where(~exists().where(Dashboard.user_id == totals.c.user_id))
+
+
+async def _reconcile(db: AsyncSession, fix: bool, tolerance: float) -> List[Dict]:
+    if db.bind.dialect.name == "postgresql":
+        # One snapshot for the report and the fix; an order written to a
+        # drifted seller meanwhile makes the UPDATE fail with a
+        # serialization error instead of overwriting its delta
+        await db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+    drifted = _drifted_dashboards(tolerance)
+    drift = [
+        {
+            "user_id": row.user_id,
+            "counters": {
+                name: {"stored": row._mapping[f"stored_{name}"], "expected": row._mapping[name]}
+                for name in ORDER_COUNTERS
+                if abs((row._mapping[f"stored_{name}"] or 0) - row._mapping[name]) > tolerance
+            },
+            "missing": False,
+        }
+        for row in await db.execute(drifted)
+    ]
+    missing = [row._asdict() for row in await db.execute(_missing_dashboards())]
+    drift.extend({"user_id": row["user_id"], "counters": {}, "missing": True} for row in missing)
+
+    if fix and drift:
+        now = datetime.utcnow()
+        table = Dashboard.__table__
+        if len(drift) > len(missing):
+            target = drifted.subquery()
+            await db.execute(
+                update(table)
+                .where(table.c.user_id == target.c.user_id)
+                .values(updated_at=now, **{name: target.c[name] for name in ORDER_COUNTERS})
+            )
+        if missing:
+            statement = upsert(table, db.bind.dialect.name).values([{**row, "updated_at": now} for row in missing])
+            await db.execute(statement.on_conflict_do_update(
+                index_elements=[table.c.user_id],
+                set_={name: statement.excluded[name] for name in (*ORDER_COUNTERS, "updated_at")},
+            ))
+        await db.commit()
+        await invalidate_dashboards(entry["user_id"] for entry in drift)
+    else:
+        await db.rollback()
+    return drift
+
+
+async def reconcile_dashboards(db: AsyncSession, fix: bool = True, tolerance: float = 0.005,
+                               attempts: int = 3) -> List[Dict]:
+    """Rebuild the order counters from the orders table in bulk.
+
+    Returns one entry per dashboard whose stored counters drifted from the
+    recomputed values. With `fix`, the drifted rows are rewritten by a
+    single UPDATE ... FROM the recomputed totals, so nothing is read into
+    Python and written back, and dashboards missing altogether are upserted.
+    On PostgreSQL this runs under REPEATABLE READ and is retried up to
+    `attempts` times if an order write races it.
+    """
+    for attempt in range(1, attempts + 1):
+        try:
+            return await _reconcile(db, fix, tolerance)
+        except DBAPIError as e:
+            await db.rollback()
+            if attempt == attempts or not is_serialization_failure(e):
+                raise
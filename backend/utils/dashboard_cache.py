@@ -0,0 +1,185 @@
+import asyncio
+import json
+import os
+import logging
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from utils.cache import TTLCache
+
+
+# Read-through cache for GET /dashboard, keyed by user id. Entries hold the
+# JSON-ready DashboardData payload. By default they live in a per-process
+# LRU; set DASHBOARD_CACHE_REDIS_URL to share one cache between workers so a
+# write on one worker is seen by all of them.
+#
+# The per-process cache only suits a single API worker with no jobs: the
+# jobs (settlement refunds, forecasts, reconcile) run in their own processes
+# and their invalidations never reach the API's cache, which keeps serving
+# the old dashboard, and 304s for it, for up to DASHBOARD_CACHE_TTL_SECONDS.
+# Those jobs log a warning when started without DASHBOARD_CACHE_REDIS_URL.
+#
+# Every invalidation bumps the user's generation. A reader takes the
+# generation before it queries and set() stores only if it is unchanged, so
+# a read that raced a write can't put the old dashboard back after the
+# write invalidated it. Generations come from one counter that only goes
+# up; a user whose own generation has been dropped reads the counter's
+# floor instead of 0, so a dropped generation can never repeat.
+DASHBOARD_CACHE_TTL_SECONDS = float(os.getenv("DASHBOARD_CACHE_TTL_SECONDS", 30))
+DASHBOARD_CACHE_SIZE = int(os.getenv("DASHBOARD_CACHE_SIZE", 10000))
+DASHBOARD_CACHE_REDIS_URL = os.getenv("DASHBOARD_CACHE_REDIS_URL")
+
+_SESSION_KEY = "dashboard_cache_dirty"
+
+
+def dashboard_etag(updated_at: datetime) -> str:
+    return f'"{int(updated_at.timestamp() * 1_000_000):x}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+class LocalBackend:
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = TTLCache("dashboard", maxsize, ttl)
+        self._maxsize = maxsize
+        self._generations = OrderedDict()
+        self._clock = 0
+        # At least every generation that has been dropped from _generations
+        self._floor = 0
+
+    async def get(self, user_id: int) -> Optional[Dict]:
+        return self._cache.get(user_id)
+
+    async def generation(self, user_id: int) -> int:
+        return self._generations.get(user_id, self._floor)
+
+    async def set(self, user_id: int, data: Dict, generation: int):
+        if self._generations.get(user_id, self._floor) == generation:
+            self._cache.set(user_id, data)
+
+    async def delete(self, user_id: int):
+        self.delete_nowait(user_id)
+
+    def delete_nowait(self, user_id: int):
+        self._clock += 1
+        self._generations.pop(user_id, None)
+        self._generations[user_id] = self._clock
+        if len(self._generations) > self._maxsize:
+            self._generations.popitem(last=False)
+            self._floor = self._clock
+        self._cache.invalidate(user_id)
+
+
+# Store the entry only if the generation is still the one the reader saw.
+# A user's generation key expires with the entry; after that the clock,
+# which never expires and is at least every generation it handed out,
+# stands in for it.
+_SET_SCRIPT = """
+local generation = redis.call('GET', KEYS[2]) or redis.call('GET', KEYS[3]) or '0'
+if generation == ARGV[2] then
+    redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[3])
+end
+"""
+
+_DELETE_SCRIPT = """
+local generation = redis.call('INCR', KEYS[3])
+redis.call('SET', KEYS[2], generation, 'EX', ARGV[1])
+redis.call('DEL', KEYS[1])
+"""
+
+_GENERATION_CLOCK_KEY = "dashboard-generation-clock"
+
+
+class RedisBackend:
+    """Any Redis-protocol server (Redis, Valkey, KeyDB, ...)."""
+
+    def __init__(self, url: str, ttl: float):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise ValueError("DASHBOARD_CACHE_REDIS_URL is set but the redis package is not installed.")
+        self._client = redis.from_url(url)
+        self._ttl = max(1, int(ttl))
+        self._pending = set()
+        self._set = self._client.register_script(_SET_SCRIPT)
+        self._delete = self._client.register_script(_DELETE_SCRIPT)
+
+    @staticmethod
+    def _key(user_id: int) -> str:
+        return f"dashboard:{user_id}"
+
+    @staticmethod
+    def _generation_key(user_id: int) -> str:
+        return f"dashboard-generation:{user_id}"
+
+    async def get(self, user_id: int) -> Optional[Dict]:
+        raw = await self._client.get(self._key(user_id))
+        return json.loads(raw) if raw is not None else None
+
+    async def generation(self, user_id: int) -> int:
+        own, clock = await self._client.mget(self._generation_key(user_id), _GENERATION_CLOCK_KEY)
+        return int(own or clock or 0)
+
+    async def set(self, user_id: int, data: Dict, generation: int):
+        await self._set(
+            keys=[self._key(user_id), self._generation_key(user_id), _GENERATION_CLOCK_KEY],
+            args=[json.dumps(data), generation, self._ttl],
+        )
+
+    async def delete(self, user_id: int):
+        await self._delete(
+            keys=[self._key(user_id), self._generation_key(user_id), _GENERATION_CLOCK_KEY],
+            args=[self._ttl],
+        )
+
+    def delete_nowait(self, user_id: int):
+        task = asyncio.get_running_loop().create_task(self.delete(user_id))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+
+if DASHBOARD_CACHE_REDIS_URL:
+    dashboard_cache = RedisBackend(DASHBOARD_CACHE_REDIS_URL, DASHBOARD_CACHE_TTL_SECONDS)
+else:
+    dashboard_cache = LocalBackend(DASHBOARD_CACHE_SIZE, DASHBOARD_CACHE_TTL_SECONDS)
+
+
+def warn_if_cache_is_local(logger: logging.Logger):
+    """For jobs that change dashboards from outside the API process."""
+    if not DASHBOARD_CACHE_REDIS_URL:
+        logger.warning(
+            "DASHBOARD_CACHE_REDIS_URL is not set: the API keeps serving cached dashboards "
+            "this job changes for up to %ss", DASHBOARD_CACHE_TTL_SECONDS,
+        )
+
+
+async def invalidate_dashboards(user_ids: Iterable[int]):
+    for user_id in user_ids:
+        await dashboard_cache.delete(user_id)
+
+
+def mark_dashboards_dirty(session: Optional[Session], user_ids: Iterable[int]):
+    """Invalidate these users' cached dashboards once `session` commits.
+
+    For writes made from sync ORM event hooks, which cannot await the cache.
+    """
+    if session is not None:
+        session.info.setdefault(_SESSION_KEY, set()).update(user_ids)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    for user_id in session.info.pop(_SESSION_KEY, ()):
+        dashboard_cache.delete_nowait(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_after_rollback(session):
+    session.info.pop(_SESSION_KEY, None)
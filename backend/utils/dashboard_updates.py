@@ -0,0 +1,82 @@
+from collections import defaultdict
+from datetime import datetime
+from typing import List, Mapping
+from fastapi import HTTPException, status
+from sqlalchemy import case, literal
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.model import Dashboard
+from utils.dashboard_cache import invalidate_dashboards
+from utils.sql import is_foreign_key_violation, upsert
+
+
+# Seller-set dashboard fields are written with INSERT ... ON CONFLICT
+# (user_id) DO UPDATE: one statement creates the row if signup hasn't yet
+# and updates it otherwise, without a read first and without racing
+# another insert. Range limits are applied in the same statement.
+# Adjustments are deltas added to a column rather than values replacing it,
+# so a correction never overwrites a concurrent withdrawal or refund.
+DASHBOARD_FIELD_LIMITS = {"shop_rating": (0.0, 5.0), "credit_score": (0, 850)}
+DASHBOARD_ADJUSTMENTS = {"balance_adjustment": "balance"}
+MAX_DASHBOARD_BATCH = 1000
+
+
+def _column(field: str) -> str:
+    return DASHBOARD_ADJUSTMENTS.get(field, field)
+
+
+def _set(table, statement, field: str):
+    column = _column(field)
+    if field in DASHBOARD_ADJUSTMENTS:
+        return table.c[column] + statement.excluded[column]
+    return statement.excluded[column]
+
+
+def _value(field: str, value):
+    bound = literal(value, Dashboard.__table__.c[field].type)
+    if field not in DASHBOARD_FIELD_LIMITS:
+        return bound
+    low, high = DASHBOARD_FIELD_LIMITS[field]
+    return case((bound < low, low), (bound > high, high), else_=bound)
+
+
+async def upsert_dashboards(db: AsyncSession, updates: Mapping[int, Mapping], returning=()) -> List:
+    """Apply {user_id: {field: value}} partial updates, creating missing dashboards.
+
+    Fields named in DASHBOARD_ADJUSTMENTS are added to their column; a new
+    dashboard starts from the adjustment itself.
+
+    Sellers are grouped by the set of fields they change and each group is
+    one multi-row statement - a single round trip for one seller, or for a
+    batch that sets the same fields. Returns the `returning` columns of
+    every written row.
+    """
+    now = datetime.utcnow()
+    groups = defaultdict(list)
+    for user_id, fields in updates.items():
+        groups[tuple(sorted(fields))].append({
+            "user_id": user_id, "updated_at": now,
+            **{_column(field): _value(_column(field), value) for field, value in fields.items()},
+        })
+
+    table = Dashboard.__table__
+    rows = []
+    try:
+        for fields, values in groups.items():
+            statement = upsert(table, db.bind.dialect.name).values(values)
+            statement = statement.on_conflict_do_update(
+                index_elements=[table.c.user_id],
+                set_={_column(field): _set(table, statement, field) for field in (*fields, "updated_at")},
+            )
+            if returning:
+                rows.extend(await db.execute(statement.returning(*returning)))
+            else:
+                await db.execute(statement)
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        if is_foreign_key_violation(e):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Unknown seller")
+        raise
+    await invalidate_dashboards(updates)
+    return rows
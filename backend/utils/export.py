@@ -0,0 +1,85 @@
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from fastapi import HTTPException, status
+from fastapi.responses import StreamingResponse
+from config.database import SessionLocal
+
+
+# Streaming exports. Rows come off a server-side cursor EXPORT_BATCH_SIZE at
+# a time and are written straight to the response, so memory stays flat no
+# matter how many rows a seller has.
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def _encode_csv(columns, rows, header: bool) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(columns)
+    writer.writerows(
+        ["" if value is None else value.isoformat() if isinstance(value, datetime) else value for value in row]
+        for row in rows
+    )
+    return buffer.getvalue().encode()
+
+
+def _encode_ndjson(columns, rows, header: bool) -> bytes:
+    return "".join(
+        json.dumps(dict(zip(columns, row)), default=_json_default) + "\n" for row in rows
+    ).encode()
+
+
+_ENCODERS = {"csv": _encode_csv, "ndjson": _encode_ndjson}
+
+
+async def _stream_rows(query, fmt: str, compress: bool):
+    encode = _ENCODERS[fmt]
+    columns = [column.name for column in query.selected_columns]
+    compressor = zlib.compressobj(wbits=31) if compress else None  # 31 = gzip container
+    header = True
+
+    # The request's own session may be closed before the body is sent, so
+    # the stream uses a session of its own
+    async with SessionLocal() as db:
+        result = await db.stream(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        async for rows in result.partitions():
+            chunk = encode(columns, rows, header)
+            header = False
+            if compressor is not None:
+                chunk = compressor.compress(chunk)
+            if chunk:
+                yield chunk
+    if header and fmt == "csv":
+        # No rows: still send the CSV header
+        chunk = encode(columns, [], True)
+        yield compressor.compress(chunk) if compressor is not None else chunk
+    if compressor is not None:
+        yield compressor.flush()
+
+
+def export_response(query, filename: str, fmt: str, compress: bool) -> StreamingResponse:
+    if fmt not in EXPORT_MEDIA_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported format. Use one of: {', '.join(EXPORT_MEDIA_TYPES)}"
+        )
+    filename = f"{filename}.{fmt}" + (".gz" if compress else "")
+    return StreamingResponse(
+        _stream_rows(query, fmt, compress),
+        media_type="application/gzip" if compress else EXPORT_MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -0,0 +1,198 @@
+import os
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+import numpy as np
+from sqlalchemy import Float, Integer, bindparam, cast, column, exists, func, select, update, values
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.model import Dashboard, OrderRollup
+from utils.dashboard_cache import invalidate_dashboards
+
+
+# Dashboard.profit_forecast is computed here, by a batch job, rather than
+# set by clients. Each seller's daily profit (revenue less tax and shipping,
+# the same definition as Dashboard.profit) is read from order_rollups into
+# one [sellers x days] matrix, and every seller is fitted at once with a
+# weighted least-squares model: intercept, linear trend and day-of-week
+# offsets, with recent days weighted more heavily.
+#
+# All sellers share the same design matrix, and the forecast is the sum of
+# the fitted model over the horizon, so it is a fixed linear function of the
+# history: one weight per day, computed once. Fitting every seller is then
+# a single matrix-vector product.
+#
+# Needs numpy (the "forecast" extra).
+FORECAST_HISTORY_DAYS = int(os.getenv("FORECAST_HISTORY_DAYS", 365))
+FORECAST_HORIZON_DAYS = int(os.getenv("FORECAST_HORIZON_DAYS", 30))
+FORECAST_HALF_LIFE_DAYS = float(os.getenv("FORECAST_HALF_LIFE_DAYS", 90))
+# Sellers with fewer days of sales than this get their recent weighted
+# average instead; a trend fitted to a handful of days is mostly noise
+FORECAST_MIN_ACTIVE_DAYS = int(os.getenv("FORECAST_MIN_ACTIVE_DAYS", 28))
+FORECAST_LOAD_CHUNK = 100_000
+# Rows per UPDATE ... FROM (VALUES ...); two parameters each, well under
+# PostgreSQL's 65535 per statement
+FORECAST_WRITE_CHUNK = 10_000
+
+
+def _design(days: np.ndarray, first_weekday: int, scale: float) -> np.ndarray:
+    """Intercept, trend and six day-of-week indicators (Monday is the baseline)."""
+    design = np.zeros((len(days), 8))
+    design[:, 0] = 1.0
+    design[:, 1] = days / scale
+    weekday = (first_weekday + days) % 7
+    rows = np.nonzero(weekday)[0]
+    design[rows, 1 + weekday[rows]] = 1.0
+    return design
+
+
+def forecast_weights(days: int, horizon_days: int, first_weekday: int,
+                     half_life_days: float = FORECAST_HALF_LIFE_DAYS) -> np.ndarray:
+    """Per-day weights w such that history @ w is the profit forecast over the horizon."""
+    history = np.arange(days)
+    design = _design(history, first_weekday, days)
+    recency = 0.5 ** ((days - 1 - history) / half_life_days)
+    weighted = design.T * recency
+    # pinv rather than solve: with under two weeks of history the
+    # day-of-week columns are not all identifiable
+    projection = np.linalg.pinv(weighted @ design) @ weighted
+    future = _design(np.arange(days, days + horizon_days), first_weekday, days).sum(axis=0)
+    return projection.T @ future
+
+
+def forecast_profits(daily: np.ndarray, first_weekday: int, horizon_days: int = FORECAST_HORIZON_DAYS,
+                     half_life_days: float = FORECAST_HALF_LIFE_DAYS,
+                     min_active_days: int = FORECAST_MIN_ACTIVE_DAYS) -> np.ndarray:
+    """Forecast total profit over the next `horizon_days` for every row of `daily`.
+
+    `daily` is [sellers x days], oldest day first; `first_weekday` is the
+    weekday of its first column (Monday is 0).
+    """
+    days = daily.shape[1]
+    trend = daily @ forecast_weights(days, horizon_days, first_weekday, half_life_days).astype(daily.dtype)
+    recency = 0.5 ** ((days - 1 - np.arange(days)) / half_life_days)
+    average = daily @ (recency / recency.sum() * horizon_days).astype(daily.dtype)
+    active = np.count_nonzero(daily, axis=1)
+    # Not clamped at zero: a seller whose tax and shipping outrun revenue
+    # has a negative profit, and Dashboard.profit shows it as one
+    return np.round(np.where(active >= min_active_days, trend, average), 2)
+
+
+def _day_expression(dialect_name: str, start: datetime):
+    if dialect_name == "postgresql":
+        return cast(func.floor(func.extract("epoch", OrderRollup.bucket_start - start) / 86400), Integer)
+    return cast(func.julianday(OrderRollup.bucket_start) - func.julianday(start), Integer)
+
+
+async def load_daily_profits(db: AsyncSession, start: datetime, days: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Seller ids (every dashboard, sorted) and their [sellers x days] daily profit from `start`.
+
+    Raises ValueError if any rollup in range predates order_rollups.shipping_fee
+    and has not been backfilled, since its profit would include shipping.
+    """
+    end = start + timedelta(days=days)
+    if await db.scalar(select(exists().where(
+        OrderRollup.bucket_start >= start, OrderRollup.bucket_start < end, OrderRollup.shipping_fee.is_(None),
+    ))):
+        raise ValueError(
+            "Order rollups in the forecast window have no shipping_fee yet; "
+            "run python -m jobs.backfill_order_rollups first"
+        )
+    user_ids = np.fromiter(
+        await db.scalars(select(Dashboard.user_id).where(Dashboard.user_id.is_not(None)).order_by(Dashboard.user_id)),
+        dtype=np.int64,
+    )
+    daily = np.zeros((len(user_ids), days), dtype=np.float32)
+    if not len(user_ids):
+        return user_ids, daily
+
+    day = _day_expression(db.bind.dialect.name, start).label("day")
+    result = await db.stream(
+        select(
+            OrderRollup.user_id,
+            day,
+            func.sum(OrderRollup.revenue - OrderRollup.tax - OrderRollup.shipping_fee),
+        )
+        .where(OrderRollup.bucket_start >= start, OrderRollup.bucket_start < end)
+        .group_by(OrderRollup.user_id, day)
+        .execution_options(yield_per=FORECAST_LOAD_CHUNK)
+    )
+    async for partition in result.partitions():
+        # Plain tuples: numpy converts Row objects an order of magnitude slower
+        chunk = np.array([tuple(row) for row in partition], dtype=np.float64)
+        sellers = np.searchsorted(user_ids, chunk[:, 0].astype(np.int64))
+        known = sellers < len(user_ids)
+        known[known] = user_ids[sellers[known]] == chunk[known, 0]
+        daily[sellers[known], chunk[known, 1].astype(np.int64)] = chunk[known, 2]
+    return user_ids, daily
+
+
+async def write_forecasts(db: AsyncSession, user_ids: np.ndarray, forecasts: np.ndarray) -> int:
+    """Store the forecasts that differ from the dashboards'; returns how many did.
+
+    Unchanged dashboards keep their updated_at, so their ETags and cached
+    copies stay valid.
+    """
+    if not len(user_ids):
+        return 0
+    forecasts = np.round(forecasts.astype(np.float64), 2)
+    stored = np.array(
+        [tuple(row) for row in await db.execute(select(Dashboard.user_id, Dashboard.profit_forecast))],
+        dtype=np.float64,
+    ).reshape(-1, 2)
+    current = np.full(len(user_ids), np.nan)
+    sellers = np.searchsorted(user_ids, stored[:, 0].astype(np.int64))
+    known = sellers < len(user_ids)
+    known[known] = user_ids[sellers[known]] == stored[known, 0]
+    current[sellers[known]] = stored[known, 1]
+    changed = np.nonzero(current != forecasts)[0]
+    if not len(changed):
+        return 0
+
+    table = Dashboard.__table__
+    now = datetime.utcnow()
+    rows = list(zip(user_ids[changed].tolist(), forecasts[changed].tolist()))
+    if db.bind.dialect.name == "postgresql":
+        for start in range(0, len(rows), FORECAST_WRITE_CHUNK):
+            new = values(
+                column("user_id", Integer), column("profit_forecast", Float), name="new",
+            ).data(rows[start:start + FORECAST_WRITE_CHUNK])
+            await db.execute(
+                update(table)
+                .where(
+                    table.c.user_id == new.c.user_id,
+                    table.c.profit_forecast.is_distinct_from(new.c.profit_forecast),
+                )
+                .values(profit_forecast=new.c.profit_forecast, updated_at=now)
+            )
+    else:
+        # SQLite has no column list on a VALUES alias
+        await db.execute(
+            update(table)
+            .where(
+                table.c.user_id == bindparam("b_user_id"),
+                table.c.profit_forecast.is_distinct_from(bindparam("profit_forecast")),
+            )
+            .values(profit_forecast=bindparam("profit_forecast"), updated_at=now),
+            [{"b_user_id": user_id, "profit_forecast": forecast} for user_id, forecast in rows],
+        )
+    await db.commit()
+    await invalidate_dashboards(user_ids[changed].tolist())
+    return len(changed)
+
+
+async def refresh_profit_forecasts(db: AsyncSession, history_days: int = FORECAST_HISTORY_DAYS,
+                                   horizon_days: int = FORECAST_HORIZON_DAYS,
+                                   today: Optional[datetime] = None,
+                                   dry_run: bool = False) -> Tuple[np.ndarray, np.ndarray, int]:
+    """Recompute Dashboard.profit_forecast for every seller from the last `history_days` full days.
+
+    Returns the seller ids, their forecasts and how many dashboards changed;
+    with dry_run nothing is written.
+    """
+    if history_days < 1 or horizon_days < 1:
+        raise ValueError("history_days and horizon_days must be positive")
+    end = (today or datetime.utcnow()).replace(hour=0, minute=0, second=0, microsecond=0)
+    start = end - timedelta(days=history_days)
+    user_ids, daily = await load_daily_profits(db, start, history_days)
+    forecasts = forecast_profits(daily, start.weekday(), horizon_days)
+    changed = 0 if dry_run else await write_forecasts(db, user_ids, forecasts)
+    return user_ids, forecasts, changed
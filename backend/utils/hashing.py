@@ -0,0 +1,102 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.model import User
+from utils import metrics
+from utils.util import get_password_hash, verify_password
+
+
+# bcrypt is deliberately slow (~100-300 ms of CPU per round). Running it inline
+# in an async endpoint freezes the event loop for every other request, so all
+# hashing goes through this bounded pool. The bcrypt C extension releases the
+# GIL, which lets a thread pool use several cores.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", min(4, os.cpu_count() or 1)))
+# Maximum number of hash jobs (queued + running) before new ones are rejected.
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", PASSWORD_HASH_WORKERS * 16))
+
+_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+_pending = 0
+_pending_lock = threading.Lock()
+
+queue_depth = metrics.gauge(
+    "password_hash_queue_depth", "Password hash jobs waiting for a worker thread"
+)
+in_progress = metrics.gauge(
+    "password_hash_in_progress", "Password hash jobs currently running"
+)
+queue_wait = metrics.histogram(
+    "password_hash_queue_wait_seconds", "Time a password hash job waited for a worker"
+)
+duration = metrics.histogram(
+    "password_hash_duration_seconds", "Time spent hashing or verifying a password", ["operation"]
+)
+rejected = metrics.counter(
+    "password_hash_rejected_total", "Password hash jobs rejected because the queue was full"
+)
+
+
+async def _submit(operation: str, fn, *args):
+    global _pending
+    with _pending_lock:
+        if _pending >= PASSWORD_HASH_MAX_PENDING:
+            rejected.inc()
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy, please retry shortly",
+                headers={"Retry-After": "1"},
+            )
+        _pending += 1
+    queue_depth.inc()
+    enqueued_at = time.perf_counter()
+
+    def run():
+        started_at = time.perf_counter()
+        queue_depth.dec()
+        in_progress.inc()
+        queue_wait.observe(started_at - enqueued_at)
+        try:
+            return fn(*args)
+        finally:
+            in_progress.dec()
+            duration.labels(operation).observe(time.perf_counter() - started_at)
+
+    def release(future):
+        global _pending
+        # A job cancelled before it started never ran `run`, so it is still
+        # counted as queued.
+        if future.cancelled():
+            queue_depth.dec()
+        with _pending_lock:
+            _pending -= 1
+
+    future = _executor.submit(run)
+    future.add_done_callback(release)
+    return await asyncio.wrap_future(future)
+
+
+async def hash_password(password: str) -> str:
+    return await _submit("hash", get_password_hash, password)
+
+
+async def check_password(plain_password: str, hashed_password: str) -> bool:
+    return await _submit("verify", verify_password, plain_password, hashed_password)
+
+
+async def authenticate_user(db: AsyncSession, email: str, password: str):
+    user = (await db.execute(
+        select(User.id, User.username, User.email, User.hashed_password).where(User.email == email)
+    )).first()
+    # Give the connection back to the pool while bcrypt runs
+    await db.close()
+    if not user or not await check_password(password, user.hashed_password):
+        return False
+    return user
+
+
+def shutdown_executor():
+    _executor.shutdown(wait=True)
@@ -0,0 +1,132 @@
+import asyncio
+import hashlib
+import json
+import os
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import Dict, Hashable, Optional
+from fastapi import HTTPException, status
+from pydantic import BaseModel
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.model import IdempotencyKey
+from utils.cache import TTLCache
+from utils.sql import upsert
+
+
+# Replayed requests carrying an Idempotency-Key get the original response
+# back instead of being executed again. Keys live in the idempotency_keys
+# table for IDEMPOTENCY_KEY_TTL_SECONDS; recently seen ones are also kept in
+# a per-process cache so bursts of retries never reach the database.
+IDEMPOTENCY_KEY_HEADER = "Idempotency-Key"
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+IDEMPOTENCY_KEY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_KEY_TTL_SECONDS", 24 * 60 * 60))
+IDEMPOTENCY_CACHE_SIZE = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", 10000))
+IDEMPOTENCY_CACHE_TTL_SECONDS = float(os.getenv("IDEMPOTENCY_CACHE_TTL_SECONDS", 600))
+
+_recent = TTLCache("idempotency", IDEMPOTENCY_CACHE_SIZE, IDEMPOTENCY_CACHE_TTL_SECONDS)
+_in_flight: Dict[Hashable, asyncio.Future] = {}
+
+
+def validate_key(key: str):
+    if not key or len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{IDEMPOTENCY_KEY_HEADER} must be 1-{IDEMPOTENCY_KEY_MAX_LENGTH} characters"
+        )
+
+
+def request_fingerprint(body: BaseModel) -> str:
+    return hashlib.sha256(body.model_dump_json().encode()).hexdigest()
+
+
+def _checked(request_hash: str, stored_hash: str, response: Dict) -> Dict:
+    if request_hash != stored_hash:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"{IDEMPOTENCY_KEY_HEADER} was already used with a different request"
+        )
+    return response
+
+
+@asynccontextmanager
+async def single_flight(user_id: int, key: str):
+    """Let only one request per (user, key) run at a time in this process.
+
+    Concurrent retries wait for the first one and then find its stored
+    response, instead of racing it to the database.
+    """
+    cache_key = (user_id, key)
+    while (running := _in_flight.get(cache_key)) is not None:
+        await asyncio.shield(running)
+    done = asyncio.get_running_loop().create_future()
+    _in_flight[cache_key] = done
+    try:
+        yield
+    finally:
+        del _in_flight[cache_key]
+        done.set_result(None)
+
+
+class KeyInUse(Exception):
+    """The key is held by another request's unexpired response."""
+
+
+async def find_response(db: AsyncSession, user_id: int, key: str, request_hash: str) -> Optional[Dict]:
+    """The stored response for this key, or None if it is unused or expired."""
+    now = datetime.utcnow()
+    cached = _recent.get((user_id, key))
+    if cached is not None and cached[2] > now:
+        return _checked(request_hash, cached[0], cached[1])
+
+    row = (await db.execute(
+        select(IdempotencyKey.request_hash, IdempotencyKey.response, IdempotencyKey.expires_at).where(
+            IdempotencyKey.user_id == user_id,
+            IdempotencyKey.key == key,
+            IdempotencyKey.expires_at > now,
+        )
+    )).first()
+    if row is None:
+        return None
+    response = json.loads(row.response)
+    _recent.set((user_id, key), (row.request_hash, response, row.expires_at))
+    return _checked(request_hash, row.request_hash, response)
+
+
+async def save_response(db: AsyncSession, user_id: int, key: str, request_hash: str, response: Dict) -> datetime:
+    """Store the response in the caller's transaction; returns when it expires.
+
+    Committing it together with the side effects means a request either
+    happened and is recorded, or neither. An expired row for the same key
+    (not yet purged) is overwritten; a live one raises KeyInUse, and the
+    caller should roll back and replay that response instead.
+    """
+    now = datetime.utcnow()
+    expires_at = now + timedelta(seconds=IDEMPOTENCY_KEY_TTL_SECONDS)
+    table = IdempotencyKey.__table__
+    statement = upsert(table, db.bind.dialect.name).values(
+        user_id=user_id,
+        key=key,
+        request_hash=request_hash,
+        response=json.dumps(response),
+        created_at=now,
+        expires_at=expires_at,
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.user_id, table.c.key],
+        set_={name: statement.excluded[name] for name in ("request_hash", "response", "created_at", "expires_at")},
+        where=table.c.expires_at <= now,
+    ).returning(table.c.id)
+    if (await db.execute(statement)).first() is None:
+        raise KeyInUse()
+    return expires_at
+
+
+def remember_response(user_id: int, key: str, request_hash: str, response: Dict, expires_at: datetime):
+    _recent.set((user_id, key), (request_hash, response, expires_at))
+
+
+async def purge_expired_keys(db: AsyncSession) -> int:
+    result = await db.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at <= datetime.utcnow()))
+    await db.commit()
+    return result.rowcount
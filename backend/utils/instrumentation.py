@@ -0,0 +1,124 @@
+import hmac
+import os
+import time
+from contextvars import ContextVar
+from typing import Optional
+from fastapi import HTTPException, status
+from sqlalchemy import event
+from config.database import engine
+from utils import metrics
+
+
+# Request and query instrumentation behind GET /metrics. Routes are labelled
+# by their template ("/withdraw/{withdrawal_id}"), never the raw path, so
+# label cardinality stays bounded. SQL statements are timed with cursor
+# events and charged to the request that issued them.
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+requests_total = metrics.counter(
+    "http_requests_total", "HTTP requests handled", ["method", "route", "status"]
+)
+request_duration = metrics.histogram(
+    "http_request_duration_seconds", "Time to handle a request, including the response body",
+    ["method", "route"],
+)
+requests_in_flight = metrics.gauge(
+    "http_requests_in_flight", "Requests currently being handled"
+)
+request_queries = metrics.histogram(
+    "http_request_db_queries", "SQL statements issued per request", ["method", "route"],
+    buckets=QUERY_COUNT_BUCKETS,
+)
+request_db_time = metrics.histogram(
+    "http_request_db_seconds", "Time spent in SQL statements per request", ["method", "route"]
+)
+query_duration = metrics.histogram(
+    "db_query_duration_seconds", "Time to execute one SQL statement"
+)
+
+
+class RequestStats:
+    __slots__ = ("queries", "db_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+
+
+# Shared by reference, so statements run from worker threads or SQLAlchemy's
+# greenlets (which copy the context) still land on the request's stats
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def current_stats() -> Optional[RequestStats]:
+    return _current.get()
+
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info["query_started"] = time.perf_counter()
+
+
+@event.listens_for(engine.sync_engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.pop("query_started", None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    query_duration.observe(elapsed)
+    stats = _current.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += elapsed
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, status and SQL usage per route.
+
+    Written against raw ASGI rather than BaseHTTPMiddleware so streamed
+    responses are timed to their last chunk without being buffered.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        requests_in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            requests_in_flight.dec()
+            _current.reset(token)
+            # The router stores the matched route in the scope
+            route = getattr(scope.get("route"), "path", "unmatched")
+            method = scope["method"]
+            requests_total.labels(method, route, status_code).inc()
+            request_duration.labels(method, route).observe(elapsed)
+            request_queries.labels(method, route).observe(stats.queries)
+            request_db_time.labels(method, route).observe(stats.db_seconds)
+
+
+def check_metrics_token(authorization: Optional[str]):
+    """Require `Authorization: Bearer $METRICS_TOKEN`; /metrics is off (404) without one."""
+    if not METRICS_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not hmac.compare_digest(authorization or "", f"Bearer {METRICS_TOKEN}"):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token")
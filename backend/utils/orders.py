@@ -0,0 +1,219 @@
+import json
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Tuple
+from fastapi import HTTPException, Request, status
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.model import Order
+from utils.aggregates import accumulate, apply_dashboard_deltas, new_deltas, order_contribution
+from utils.dashboard_cache import mark_dashboards_dirty
+from utils.rollups import accumulate_rollup, apply_rollup_deltas, new_rollup_deltas, rollup_contribution
+from utils.pydantic import BulkOrderResponse, BulkOrderResult, OrderCreate
+from utils.sql import upsert
+
+
+# Bulk order ingestion. Rows are upserted on order_number with multi-row
+# INSERT ... ON CONFLICT DO UPDATE statements, INGEST_CHUNK_SIZE rows per
+# ownership check, and dashboard counters are adjusted once for the whole
+# batch, as are the analytics rollups.
+INGEST_CHUNK_SIZE = 1000
+MAX_BULK_ORDERS = 100_000
+
+NDJSON_MEDIA_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+
+# Columns an upsert may overwrite; created_at and user_id stay as inserted
+_UPDATABLE = (
+    "status", "currency", "item_count", "subtotal", "discount", "tax", "shipping_fee",
+    "total", "updated_at", "paid_at", "fulfilled_at", "cancelled_at",
+)
+
+
+async def read_bulk_rows(request: Request) -> AsyncIterator[Tuple[int, object]]:
+    """Yield (index, raw row) from a JSON array body or an NDJSON stream.
+
+    NDJSON bodies are parsed line by line as they arrive; a line that is not
+    valid JSON is yielded as a ValueError so it becomes a per-row error.
+    """
+    media_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if media_type in NDJSON_MEDIA_TYPES:
+        index = 0
+        buffer = b""
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    yield index, _parse_line(line)
+                    index += 1
+        if buffer.strip():
+            yield index, _parse_line(buffer)
+        return
+
+    try:
+        rows = json.loads(await request.body())
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Body is not valid JSON")
+    if not isinstance(rows, list):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Body must be a JSON array of orders or an NDJSON stream"
+        )
+    for index, row in enumerate(rows):
+        yield index, row
+
+
+def _parse_line(line: bytes):
+    try:
+        return json.loads(line)
+    except ValueError as e:
+        return ValueError(f"Invalid JSON: {e}")
+
+
+def _error(index: int, message: str, order_number=None) -> BulkOrderResult:
+    return BulkOrderResult(index=index, order_number=order_number, result="error", error=message)
+
+
+async def ingest_orders(db: AsyncSession, user_id: int, rows: AsyncIterator[Tuple[int, object]]) -> BulkOrderResponse:
+    """Validate and upsert a batch of orders for one seller in one transaction."""
+    results: List[BulkOrderResult] = []
+    deltas = new_deltas()
+    rollup_deltas = new_rollup_deltas()
+    chunk: List[Tuple[int, OrderCreate]] = []
+    count = 0
+
+    async for index, raw in rows:
+        count += 1
+        if count > MAX_BULK_ORDERS:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"At most {MAX_BULK_ORDERS} orders per request"
+            )
+        if isinstance(raw, ValueError):
+            results.append(_error(index, str(raw)))
+            continue
+        try:
+            chunk.append((index, OrderCreate.model_validate(raw)))
+        except ValidationError as e:
+            number = raw.get("order_number") if isinstance(raw, dict) else None
+            results.append(_error(index, "; ".join(
+                f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()
+            ), number if isinstance(number, str) else None))
+            continue
+        if len(chunk) >= INGEST_CHUNK_SIZE:
+            await _upsert_chunk(db, user_id, chunk, deltas, rollup_deltas, results)
+            chunk = []
+    if chunk:
+        await _upsert_chunk(db, user_id, chunk, deltas, rollup_deltas, results)
+
+    await db.run_sync(lambda session: apply_dashboard_deltas(session.connection(), deltas))
+    await db.run_sync(lambda session: apply_rollup_deltas(session.connection(), rollup_deltas))
+    mark_dashboards_dirty(db.sync_session, deltas)
+    await db.commit()
+
+    results.sort(key=lambda result: result.index)
+    return BulkOrderResponse(
+        created=sum(result.result == "created" for result in results),
+        updated=sum(result.result == "updated" for result in results),
+        failed=sum(result.result == "error" for result in results),
+        results=results,
+    )
+
+
+async def _lock_existing(db: AsyncSession, numbers) -> Dict[str, Row]:
+    return {
+        row.order_number: row
+        for row in await db.execute(
+            select(Order.order_number, Order.user_id, Order.status, Order.item_count,
+                   Order.total, Order.discount, Order.tax, Order.shipping_fee, Order.created_at)
+            .where(Order.order_number.in_(numbers))
+            # Lock, and below write, in order_number order so two uploads
+            # sharing orders can't each hold a lock the other is waiting on
+            .order_by(Order.order_number)
+            .with_for_update()
+        )
+    }
+
+
+async def _upsert_chunk(db: AsyncSession, user_id: int, chunk: List[Tuple[int, OrderCreate]],
+                        deltas: Dict, rollup_deltas: Dict, results: List[BulkOrderResult]):
+    # A statement can't touch the same row twice; the last occurrence wins
+    latest: Dict[str, Tuple[int, OrderCreate]] = {}
+    for index, order in chunk:
+        if order.order_number in latest:
+            earlier = latest[order.order_number][0]
+            results.append(_error(earlier, "Superseded by a later row with the same order_number", order.order_number))
+        latest[order.order_number] = (index, order)
+
+    existing = await _lock_existing(db, latest)
+
+    now = datetime.utcnow()
+    values = {}
+    created = {}
+    for number, (index, order) in sorted(latest.items(), key=lambda item: item[0]):
+        row = order.model_dump()
+        row.update(user_id=user_id, updated_at=now, created_at=order.created_at or now)
+        created[number] = row["created_at"]
+        values[number] = row
+
+    # New orders are inserted with ON CONFLICT DO NOTHING, so only the rows
+    # this upload created come back. An order another upload inserted after
+    # the SELECT above (which can't lock a row that doesn't exist yet) is
+    # locked and read now and then updated like any existing order, so its
+    # earlier contribution is subtracted rather than counted twice.
+    ids = {}
+    new_rows = [row for number, row in values.items() if number not in existing]
+    if new_rows:
+        statement = upsert(Order, db.bind.dialect.name).on_conflict_do_nothing(
+            index_elements=[Order.order_number],
+        ).returning(Order.id, Order.order_number)
+        ids.update({row.order_number: row.id for row in await db.execute(statement, new_rows)})
+        raced = [row["order_number"] for row in new_rows if row["order_number"] not in ids]
+        if raced:
+            existing.update(await _lock_existing(db, raced))
+
+    for number, previous in existing.items():
+        if previous.user_id != user_id:
+            results.append(_error(latest[number][0], "order_number belongs to another seller", number))
+            del latest[number], values[number]
+    updated_rows = [row for number, row in values.items() if number in existing]
+    if updated_rows:
+        # executemany: SQLAlchemy batches the rows into multi-row VALUES
+        # ("insertmanyvalues") while compiling the statement only once
+        statement = upsert(Order, db.bind.dialect.name)
+        statement = statement.on_conflict_do_update(
+            index_elements=[Order.order_number],
+            set_={name: statement.excluded[name] for name in _UPDATABLE},
+            # The rows are locked and checked above; this only guards
+            # against ever taking over another seller's order
+            where=Order.user_id == statement.excluded.user_id,
+        ).returning(Order.id, Order.order_number)
+        ids.update({row.order_number: row.id for row in await db.execute(statement, updated_rows)})
+
+    for number, (index, order) in latest.items():
+        if number not in ids:
+            results.append(_error(index, "order_number belongs to another seller", number))
+            continue
+        previous = existing.get(number)
+        results.append(BulkOrderResult(
+            index=index, order_number=number, id=ids[number],
+            result="updated" if previous is not None else "created",
+        ))
+        accumulate(deltas, user_id, order_contribution(
+            order.status, order.item_count, order.total, order.tax, order.shipping_fee
+        ))
+        if previous is not None:
+            accumulate(deltas, user_id, order_contribution(
+                previous.status, previous.item_count, previous.total, previous.tax, previous.shipping_fee
+            ), sign=-1)
+            accumulate_rollup(rollup_deltas, user_id, previous.created_at, rollup_contribution(
+                previous.status, previous.item_count, previous.total, previous.discount, previous.tax,
+                previous.shipping_fee,
+            ), sign=-1)
+        # Upserts never change created_at, so an update stays in its original hour
+        created_at = previous.created_at if previous is not None else created[number]
+        accumulate_rollup(rollup_deltas, user_id, created_at, rollup_contribution(
+            order.status, order.item_count, order.total, order.discount, order.tax, order.shipping_fee
+        ))
@@ -0,0 +1,73 @@
+import asyncio
+import importlib
+import random
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+
+@dataclass
+class PayoutResult:
+    withdrawal_id: int
+    succeeded: bool
+    reference: Optional[str] = None
+    error: Optional[str] = None
+
+
+class PayoutAdapter(ABC):
+    """Sends a batch of withdrawals for one method (easypaisa, jazzcash).
+
+    `withdrawals` are rows with id, user_id, phone_number, amount, currency
+    and transaction_id. Implementations must return one result per row.
+
+    The same withdrawal can be sent more than once: a worker that dies
+    after paying but before recording the outcome leaves it claimed, and it
+    is sent again once the claim times out. Implementations must therefore
+    be idempotent on transaction_id - pass it to the provider as the
+    idempotency/reference key, or look it up first - and return the
+    original outcome for a repeat instead of paying twice.
+    """
+
+    @abstractmethod
+    async def send_batch(self, method: str, withdrawals: Sequence) -> List[PayoutResult]:
+        ...
+
+
+class FakePayoutAdapter(PayoutAdapter):
+    """Local stand-in for the wallet providers, for development and tests."""
+
+    def __init__(self, failure_rate: float = 0.0, latency: float = 0.0):
+        self.failure_rate = failure_rate
+        self.latency = latency
+        self.sent: List[int] = []
+        self._outcomes: Dict[str, PayoutResult] = {}
+
+    async def send_batch(self, method: str, withdrawals: Sequence) -> List[PayoutResult]:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        results = []
+        for withdrawal in withdrawals:
+            result = self._outcomes.get(withdrawal.transaction_id)
+            if result is None:
+                self.sent.append(withdrawal.id)
+                if random.random() < self.failure_rate:
+                    result = PayoutResult(withdrawal.id, False, error="rejected by fake provider")
+                else:
+                    result = PayoutResult(withdrawal.id, True, reference=f"FAKE-{uuid.uuid4().hex[:12].upper()}")
+                self._outcomes[withdrawal.transaction_id] = result
+            results.append(result)
+        return results
+
+
+def load_adapter(spec: str) -> PayoutAdapter:
+    """Build an adapter from "fake" or a "package.module:ClassName" path."""
+    if spec == "fake":
+        return FakePayoutAdapter()
+    module_name, _, class_name = spec.partition(":")
+    if not class_name:
+        raise ValueError(f"Payout adapter must be 'fake' or 'module:ClassName', got {spec!r}")
+    adapter = getattr(importlib.import_module(module_name), class_name)()
+    if not isinstance(adapter, PayoutAdapter):
+        raise ValueError(f"{spec} is not a PayoutAdapter")
+    return adapter
@@ -0,0 +1,193 @@
+import cProfile
+import io
+import itertools
+import os
+import pstats
+import random
+import time
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Dict, List, Optional
+from sqlalchemy import event
+from config.database import engine
+from utils.util import ADMIN_TOKEN_HEADER, is_admin_token
+
+
+# On-demand request profiling. With PROFILING=on, a request is profiled
+# when it carries "X-Profile: 1" together with a valid admin token, or at
+# random for PROFILE_SAMPLE_RATE of requests. The call tree and the SQL the
+# request ran (with offsets and durations) are kept in a ring buffer of
+# the last PROFILE_BUFFER_SIZE profiles, served by GET /admin/profiles.
+#
+# With PROFILING=off (the default) no middleware or SQL hooks are
+# installed at all.
+#
+# cProfile sees every coroutine scheduled on the loop while the request is
+# in flight, not just this request's; install pyinstrument and set
+# PROFILER=pyinstrument for a tree that follows the request across awaits.
+PROFILING_ENABLED = os.getenv("PROFILING", "off").lower() in ("1", "on", "true", "yes")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", 0))
+PROFILE_BUFFER_SIZE = int(os.getenv("PROFILE_BUFFER_SIZE", 50))
+PROFILER = os.getenv("PROFILER", "cprofile").lower()
+PROFILE_HEADER = "X-Profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+PROFILE_STATS_LIMIT = 60  # functions shown in a cProfile report
+
+if PROFILER not in ("cprofile", "pyinstrument"):
+    raise ValueError("PROFILER must be cprofile or pyinstrument")
+
+profiles: deque = deque(maxlen=PROFILE_BUFFER_SIZE)
+_ids = itertools.count(1)
+_statements: ContextVar[Optional[List[Dict]]] = ContextVar("profiled_statements", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _statements.get() is not None:
+        conn.info["profile_query_started"] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    statements = _statements.get()
+    started = conn.info.pop("profile_query_started", None)
+    if statements is not None and started is not None:
+        statements.append({
+            "started": started,
+            "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+            "statement": statement,
+            "executemany": executemany,
+        })
+
+
+class _CProfiler:
+    name = "cprofile"
+
+    def __init__(self):
+        self._profile = cProfile.Profile()
+
+    def start(self):
+        self._profile.enable()
+
+    def stop(self):
+        self._profile.disable()
+
+    def report(self) -> str:
+        out = io.StringIO()
+        stats = pstats.Stats(self._profile, stream=out)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(PROFILE_STATS_LIMIT)
+        return out.getvalue()
+
+
+class _PyinstrumentProfiler:
+    name = "pyinstrument"
+
+    def __init__(self):
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            raise ValueError("PROFILER=pyinstrument but the pyinstrument package is not installed.")
+        self._profile = Profiler(async_mode="enabled")
+
+    def start(self):
+        self._profile.start()
+
+    def stop(self):
+        self._profile.stop()
+
+    def report(self) -> str:
+        return self._profile.output_text(unicode=True, show_all=False)
+
+
+def _new_profiler():
+    return _PyinstrumentProfiler() if PROFILER == "pyinstrument" else _CProfiler()
+
+
+class ProfilingMiddleware:
+    """Profiles requests that ask for it (admin header) or are sampled.
+
+    Only one request is profiled at a time: the interpreter allows a single
+    active profiler, so requests arriving meanwhile run unprofiled.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._busy = False
+
+    def _wanted(self, scope) -> bool:
+        headers = dict(scope["headers"])
+        if headers.get(PROFILE_HEADER.lower().encode()) == b"1":
+            token = headers.get(ADMIN_TOKEN_HEADER.lower().encode(), b"").decode("latin-1")
+            if is_admin_token(token):
+                return True
+        return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self._busy or not self._wanted(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = next(_ids)
+        status_code = 500
+
+        async def send_with_id(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((PROFILE_ID_HEADER.lower().encode(), str(profile_id).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        profiler = _new_profiler()
+        try:
+            profiler.start()
+        except ValueError:
+            # Another profiler or debugger already owns the interpreter
+            await self.app(scope, receive, send)
+            return
+        self._busy = True
+        statements: List[Dict] = []
+        token = _statements.set(statements)
+        started_at = datetime.utcnow()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            profiler.stop()
+            elapsed = time.perf_counter() - started
+            _statements.reset(token)
+            self._busy = False
+            for statement in statements:
+                statement["offset_ms"] = round((statement.pop("started") - started) * 1000, 3)
+            profiles.append({
+                "id": profile_id,
+                "method": scope["method"],
+                "path": scope["path"],
+                "route": getattr(scope.get("route"), "path", None),
+                "status": status_code,
+                "started_at": started_at.isoformat(),
+                "duration_ms": round(elapsed * 1000, 3),
+                "profiler": profiler.name,
+                "sql_count": len(statements),
+                "sql_ms": round(sum(statement["duration_ms"] for statement in statements), 3),
+                "sql": statements,
+                "report": profiler.report(),
+            })
+
+
+def list_profiles() -> List[Dict]:
+    """Summaries of the buffered profiles, newest first."""
+    return [
+        {key: value for key, value in profile.items() if key not in ("sql", "report")}
+        for profile in reversed(profiles)
+    ]
+
+
+def get_profile(profile_id: int) -> Optional[Dict]:
+    return next((profile for profile in profiles if profile["id"] == profile_id), None)
+
+
+if PROFILING_ENABLED:
+    _new_profiler()  # fail at startup, not on the first profiled request, if it is unavailable
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
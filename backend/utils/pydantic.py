@@ -1,6 +1,16 @@
-from pydantic import BaseModel, EmailStr
-from datetime import datetime
-from typing import Optional
+from pydantic import AfterValidator, BaseModel, ConfigDict, EmailStr, Field
+from datetime import datetime, timezone
+from typing import Annotated, List, Literal, Optional
+
+
+def naive_utc(moment: datetime) -> datetime:
+    """Timestamps are stored as naive UTC; convert aware ones, keep naive ones as they are."""
+    if moment.tzinfo is None:
+        return moment
+    return moment.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+UtcDatetime = Annotated[datetime, AfterValidator(naive_utc)]
 
 
 class UserSignup(BaseModel):
@@ -14,6 +24,8 @@ class ChatRequest(BaseModel):
 
 
 class OrderResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
     user_id: int
     order_number: str
@@ -26,8 +38,64 @@ class OrderResponse(BaseModel):
     currency: str
     created_at: datetime
 
-    class Config:
-        orm_mode = True
+
+class OrderCreate(BaseModel):
+    order_number: str = Field(min_length=1, max_length=40)
+    status: Literal["pending", "paid", "shipped", "delivered", "cancelled", "refunded"] = "pending"
+    currency: str = Field("PKR", max_length=5)
+    item_count: int = Field(1, ge=0)
+    subtotal: float = Field(0.0, ge=0)
+    discount: float = Field(0.0, ge=0)
+    tax: float = Field(0.0, ge=0)
+    shipping_fee: float = Field(0.0, ge=0)
+    total: float = Field(0.0, ge=0)
+    created_at: Optional[UtcDatetime] = None
+    paid_at: Optional[UtcDatetime] = None
+    fulfilled_at: Optional[UtcDatetime] = None
+    cancelled_at: Optional[UtcDatetime] = None
+
+class BulkOrderResult(BaseModel):
+    index: int
+    order_number: Optional[str] = None
+    result: Literal["created", "updated", "error"]
+    id: Optional[int] = None
+    error: Optional[str] = None
+
+class BulkOrderResponse(BaseModel):
+    created: int
+    updated: int
+    failed: int
+    results: List[BulkOrderResult]
+
+
+
+class OrderAnalyticsBucket(BaseModel):
+    bucket_start: datetime
+    order_count: int
+    item_count: int
+    revenue: float
+    discount: float
+    tax: float
+    shipping_fee: float
+    refund_count: int
+    refunds: float
+
+class OrderAnalyticsTotals(BaseModel):
+    order_count: int
+    item_count: int
+    revenue: float
+    discount: float
+    tax: float
+    shipping_fee: float
+    refund_count: int
+    refunds: float
+
+class OrderAnalytics(BaseModel):
+    granularity: Literal["hour", "day", "week"]
+    start: datetime
+    end: datetime
+    buckets: List[OrderAnalyticsBucket]
+    totals: OrderAnalyticsTotals
 
 
 
@@ -60,6 +128,22 @@ class DashboardData(BaseModel):
     credit_score: int
     updated_at: datetime
 
+class DashboardUpdate(BaseModel):
+    # Omitted or null fields are left unchanged; shop_rating and
+    # credit_score are clamped to their ranges when written. The balance is
+    # owned by the server (withdrawals, refunds) and is not settable here.
+    model_config = ConfigDict(extra="forbid", allow_inf_nan=False)
+
+    total_sales: Optional[float] = None
+    shop_followers: Optional[int] = Field(None, ge=0)
+    shop_rating: Optional[float] = None
+    credit_score: Optional[int] = None
+
+class SellerDashboardUpdate(DashboardUpdate):
+    user_id: int
+    # Admin correction added to the current balance, never an absolute value
+    balance_adjustment: Optional[float] = None
+
 class WithdrawalRequest(BaseModel):
     method: str  # easypaisa or jazzcash
     phone_number: str
@@ -69,6 +153,8 @@ class WithdrawalRequest(BaseModel):
 
 
 class WithdrawalResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
     method: str
     phone_number: str
@@ -0,0 +1,138 @@
+import logging
+import os
+import re
+from collections import Counter
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+from sqlalchemy import event
+from config.database import engine
+
+
+# Development aid: count the SQL statements each request issues, flag the
+# same statement shape running over and over (the usual sign of an N+1
+# lazy load) and compare the total with the route's budget.
+#
+#   SQL_QUERY_BUDGET_MODE   off (default), log, or raise. "raise" turns a
+#                           violation into an exception, so the test client
+#                           fails the test that triggered it.
+#   SQL_QUERY_BUDGET        budget for routes without @query_budget
+#   SQL_REPEAT_THRESHOLD    identical shapes per request before flagging
+logger = logging.getLogger(__name__)
+
+SQL_QUERY_BUDGET_MODE = os.getenv("SQL_QUERY_BUDGET_MODE", "off").lower()
+SQL_QUERY_BUDGET = int(os.getenv("SQL_QUERY_BUDGET", 10))
+SQL_REPEAT_THRESHOLD = int(os.getenv("SQL_REPEAT_THRESHOLD", 3))
+QUERY_COUNT_HEADER = "X-Query-Count"
+
+if SQL_QUERY_BUDGET_MODE not in ("off", "log", "raise"):
+    raise ValueError("SQL_QUERY_BUDGET_MODE must be off, log or raise")
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryLog:
+    def __init__(self):
+        self.statements: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.statements)
+
+    def repeated(self, threshold: int = SQL_REPEAT_THRESHOLD) -> Dict[str, int]:
+        """Statement shapes that ran at least `threshold` times."""
+        shapes = Counter(statement_shape(statement) for statement in self.statements)
+        return {shape: count for shape, count in shapes.items() if count >= threshold}
+
+    def check(self, budget: int, repeat_threshold: int = SQL_REPEAT_THRESHOLD) -> List[str]:
+        """Problems with this log, empty when it is within budget."""
+        problems = []
+        if len(self) > budget:
+            problems.append(f"{len(self)} statements, budget is {budget}")
+        for shape, count in self.repeated(repeat_threshold).items():
+            problems.append(f"{count}x repeated (possible N+1): {shape}")
+        return problems
+
+
+_whitespace = re.compile(r"\s+")
+_numbers = re.compile(r"\b\d+(\.\d+)?\b")
+_strings = re.compile(r"'(?:[^']|'')*'")
+# Expanded IN lists and multi-row VALUES vary in length with the data
+_placeholder_lists = re.compile(r"\((?:\s*(?:\?|%s|\$\d+|%\(\w+\)s|:\w+)\s*,)+\s*(?:\?|%s|\$\d+|%\(\w+\)s|:\w+)\s*\)")
+
+
+def statement_shape(statement: str) -> str:
+    shape = _whitespace.sub(" ", statement).strip()
+    shape = _strings.sub("?", shape)
+    shape = _placeholder_lists.sub("(...)", shape)
+    return _numbers.sub("?", shape)
+
+
+_current: ContextVar[Optional[QueryLog]] = ContextVar("query_log", default=None)
+
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _record_statement(conn, cursor, statement, parameters, context, executemany):
+    log = _current.get()
+    if log is not None:
+        log.statements.append(statement)
+
+
+def query_budget(budget: Optional[int]):
+    """Declare how many statements a route may issue; None opts it out.
+
+    Apply below the route decorator:
+
+        @app.get("/orders")
+        @query_budget(2)
+        async def get_my_orders(...):
+    """
+    def decorate(endpoint):
+        endpoint.query_budget = budget
+        return endpoint
+    return decorate
+
+
+class QueryBudgetMiddleware:
+    """Checks every request against its route's query budget.
+
+    Adds an X-Query-Count header with the statements issued before the
+    response started (streamed bodies can issue more afterwards).
+    """
+
+    def __init__(self, app, mode: str = SQL_QUERY_BUDGET_MODE):
+        self.app = app
+        self.mode = mode
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        log = QueryLog()
+
+        async def send_with_count(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((QUERY_COUNT_HEADER.lower().encode(), str(len(log)).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        token = _current.set(log)
+        try:
+            await self.app(scope, receive, send_with_count)
+        finally:
+            _current.reset(token)
+
+        route = scope.get("route")
+        budget = getattr(getattr(route, "endpoint", None), "query_budget", SQL_QUERY_BUDGET)
+        if budget is None:
+            return
+        problems = log.check(budget)
+        if not problems:
+            return
+        path = getattr(route, "path", scope["path"])
+        message = f"{scope['method']} {path}: " + "; ".join(problems)
+        logger.warning("%s\n%s", message, "\n".join(f"  {statement}" for statement in log.statements))
+        if self.mode == "raise":
+            raise QueryBudgetExceeded(message)
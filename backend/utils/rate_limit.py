@@ -0,0 +1,218 @@
+import logging
+import math
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+from fastapi import HTTPException, Request, status
+from utils import metrics
+
+
+# Token buckets in front of the expensive routes: login and signup (bcrypt)
+# and withdrawals. Each limit is "requests/seconds" - a bucket holding that
+# many tokens, refilled evenly over that many seconds - so short bursts pass
+# and sustained floods get 429 with a Retry-After. A check is O(1): one dict
+# lookup in memory, or one script call against the shared store.
+#
+#   RATE_LIMITING            on (default) or off
+#   RATE_LIMIT_REDIS_URL     share buckets between workers through a Redis-
+#                            protocol server; per-process buckets otherwise
+#   RATE_LIMIT_MAX_KEYS      per-process buckets kept, least recently used
+#                            dropped first
+#   RATE_LIMIT_<NAME>        a limit below; empty or "off" disables it
+#
+# Client IPs come from the connection. Behind a reverse proxy run uvicorn
+# with --proxy-headers and --forwarded-allow-ips so that is the real client.
+logger = logging.getLogger(__name__)
+
+RATE_LIMITING_ENABLED = os.getenv("RATE_LIMITING", "on").lower() in ("1", "on", "true", "yes")
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL")
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", 100_000))
+
+
+@dataclass(frozen=True)
+class Rate:
+    capacity: float
+    per_second: float
+
+    @classmethod
+    def parse(cls, value: str) -> Optional["Rate"]:
+        if not value or value.lower() == "off":
+            return None
+        count, _, seconds = value.partition("/")
+        try:
+            count, seconds = float(count), float(seconds)
+        except ValueError:
+            raise ValueError(f"Rate limits look like 10/60 (requests/seconds), got {value!r}")
+        if count <= 0 or seconds <= 0:
+            raise ValueError(f"Rate limit {value!r} must be positive")
+        return cls(count, count / seconds)
+
+
+def _limit(name: str, default: str) -> Optional[Rate]:
+    return Rate.parse(os.getenv(f"RATE_LIMIT_{name}", default))
+
+
+LOGIN_PER_IP = _limit("LOGIN_PER_IP", "30/60")
+LOGIN_PER_ACCOUNT = _limit("LOGIN_PER_ACCOUNT", "50/900")
+LOGIN_PER_ACCOUNT_IP = _limit("LOGIN_PER_ACCOUNT_IP", "10/300")
+SIGNUP_PER_IP = _limit("SIGNUP_PER_IP", "10/60")
+WITHDRAW_PER_IP = _limit("WITHDRAW_PER_IP", "60/60")
+WITHDRAW_PER_ACCOUNT = _limit("WITHDRAW_PER_ACCOUNT", "10/60")
+
+checked = metrics.counter(
+    "rate_limit_checks_total", "Requests checked against a rate limit", ["limit"]
+)
+rejected = metrics.counter(
+    "rate_limit_rejected_total", "Requests rejected by a rate limit", ["limit"]
+)
+store_errors = metrics.counter(
+    "rate_limit_store_errors_total", "Rate limit checks let through because the shared store failed"
+)
+
+
+class MemoryBuckets:
+    def __init__(self, max_keys: int):
+        self._buckets: OrderedDict = OrderedDict()
+        self._max_keys = max_keys
+
+    async def take(self, key: str, rate: Rate, cost: int = 1) -> float:
+        """Take `cost` tokens; returns 0 if one was available, else seconds until one is."""
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(key, (rate.capacity, now))
+        tokens = min(rate.capacity, tokens + (now - updated) * rate.per_second)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= cost
+        else:
+            wait = (1 - tokens) / rate.per_second
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self._max_keys:
+            # A dropped bucket comes back full, which only ever errs on the
+            # side of letting a request through
+            self._buckets.popitem(last=False)
+        return wait
+
+
+# Refill, take and store in one atomic step. Buckets expire once they would
+# have refilled completely, so idle keys cost nothing.
+_TAKE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - cost
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return tostring(wait)
+"""
+
+
+class RedisBuckets:
+    """Buckets shared by every worker, in any Redis-protocol server.
+
+    If the server can't be reached the request is let through (and counted
+    in rate_limit_store_errors_total) rather than failing the route.
+    """
+
+    def __init__(self, url: str):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise ValueError("RATE_LIMIT_REDIS_URL is set but the redis package is not installed.")
+        self._errors = redis.RedisError
+        self._client = redis.from_url(url)
+        self._take = self._client.register_script(_TAKE_SCRIPT)
+
+    async def take(self, key: str, rate: Rate, cost: int = 1) -> float:
+        try:
+            wait = await self._take(
+                keys=[f"ratelimit:{key}"], args=[rate.capacity, rate.per_second, time.time(), cost]
+            )
+        except self._errors:
+            logger.warning("Rate limit store unavailable, allowing request", exc_info=True)
+            store_errors.inc()
+            return 0.0
+        return float(wait)
+
+
+if RATE_LIMIT_REDIS_URL:
+    buckets = RedisBuckets(RATE_LIMIT_REDIS_URL)
+else:
+    buckets = MemoryBuckets(RATE_LIMIT_MAX_KEYS)
+
+
+async def enforce(limit: str, rate: Optional[Rate], key, cost: int = 1) -> None:
+    """Charge `cost` requests to `key`'s bucket for `limit`; 429 if it is empty.
+
+    A cost of 0 only checks the bucket, for limits charged later with charge().
+    """
+    if not RATE_LIMITING_ENABLED or rate is None:
+        return
+    checked.labels(limit).inc()
+    wait = await buckets.take(f"{limit}:{key}", rate, cost)
+    if wait > 0:
+        rejected.labels(limit).inc()
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many requests, please retry later",
+            headers={"Retry-After": str(max(1, math.ceil(wait)))},
+        )
+
+
+async def charge(limit: str, rate: Optional[Rate], key) -> None:
+    """Take a token from `key`'s bucket for `limit` without rejecting anything."""
+    if RATE_LIMITING_ENABLED and rate is not None:
+        await buckets.take(f"{limit}:{key}", rate)
+
+
+def client_ip(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+
+
+async def limit_login(request: Request):
+    await enforce("login_ip", LOGIN_PER_IP, client_ip(request))
+
+
+# Only failed logins are charged to the per-account buckets. The account
+# bucket caps guessing at one password from any number of IPs; the tighter
+# account-and-client bucket stops a single client well before that, so one
+# guesser alone can't lock the owner out of their own account.
+def _login_account(email: str) -> str:
+    return email.strip().lower()
+
+
+async def limit_login_account(request: Request, email: str):
+    account = _login_account(email)
+    await enforce("login_account_ip", LOGIN_PER_ACCOUNT_IP, f"{account}|{client_ip(request)}", cost=0)
+    await enforce("login_account", LOGIN_PER_ACCOUNT, account, cost=0)
+
+
+async def charge_failed_login(request: Request, email: str):
+    account = _login_account(email)
+    await charge("login_account_ip", LOGIN_PER_ACCOUNT_IP, f"{account}|{client_ip(request)}")
+    await charge("login_account", LOGIN_PER_ACCOUNT, account)
+
+
+async def limit_signup(request: Request):
+    await enforce("signup_ip", SIGNUP_PER_IP, client_ip(request))
+
+
+async def limit_withdrawals(request: Request):
+    await enforce("withdraw_ip", WITHDRAW_PER_IP, client_ip(request))
+
+
+# Charged by the route only once it knows the request isn't an idempotent
+# replay, so retrying a withdrawal never uses up the account's allowance
+async def limit_withdrawal_account(user_id: int):
+    await enforce("withdraw_account", WITHDRAW_PER_ACCOUNT, user_id)
@@ -0,0 +1,236 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+from fastapi import HTTPException, status
+from sqlalchemy import case, delete, event, func, insert, inspect, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.model import Order, OrderRollup
+from utils.aggregates import COUNTED_STATUSES
+from utils.pydantic import naive_utc
+from utils.sql import upsert
+
+
+# Seller analytics are served from order_rollups: one row per seller per
+# hour, kept current the same way as the dashboard counters - every Order
+# write adds the difference between the order's new and old contribution
+# to the hour its created_at falls in. Day and week buckets are folded from
+# hours when read, so a query touches at most one row per hour in range,
+# however many orders those hours hold.
+
+ROLLUP_MEASURES = (
+    "order_count", "item_count", "revenue", "discount", "tax", "shipping_fee", "refund_count", "refunds",
+)
+GRANULARITIES = ("hour", "day", "week")
+MAX_ANALYTICS_BUCKETS = 2000
+
+_TRACKED_ATTRIBUTES = ("user_id", "created_at", "status", "item_count", "total", "discount", "tax", "shipping_fee")
+
+RollupKey = Tuple[int, datetime]
+
+
+def hour_bucket(moment: datetime) -> datetime:
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def bucket_start(moment: datetime, granularity: str) -> datetime:
+    start = hour_bucket(moment)
+    if granularity == "hour":
+        return start
+    start = start.replace(hour=0)
+    if granularity == "week":
+        start -= timedelta(days=start.weekday())  # weeks start on Monday
+    return start
+
+
+def _step(granularity: str) -> timedelta:
+    return {"hour": timedelta(hours=1), "day": timedelta(days=1), "week": timedelta(weeks=1)}[granularity]
+
+
+def rollup_contribution(status, item_count, total, discount, tax, shipping_fee) -> Dict[str, float]:
+    """What a single order adds to its hour's rollup row."""
+    if status in COUNTED_STATUSES:
+        return {
+            "order_count": 1, "item_count": item_count or 0, "revenue": total or 0.0,
+            "discount": discount or 0.0, "tax": tax or 0.0, "shipping_fee": shipping_fee or 0.0,
+            "refund_count": 0, "refunds": 0.0,
+        }
+    contribution = dict.fromkeys(ROLLUP_MEASURES, 0)
+    if status == "refunded":
+        contribution.update(refund_count=1, refunds=total or 0.0)
+    return contribution
+
+
+def new_rollup_deltas() -> Dict[RollupKey, Dict[str, float]]:
+    return defaultdict(dict)
+
+
+def accumulate_rollup(deltas: Dict[RollupKey, Dict[str, float]], user_id: int, created_at: datetime,
+                      contribution: Dict[str, float], sign: int = 1):
+    totals = deltas[(user_id, hour_bucket(created_at))]
+    for measure, value in contribution.items():
+        totals[measure] = totals.get(measure, 0) + sign * value
+
+
+def apply_rollup_deltas(connection, deltas: Dict[RollupKey, Dict[str, float]]):
+    """Add per-(seller, hour) deltas to order_rollups with one executemany upsert.
+
+    Runs on a sync Connection, like apply_dashboard_deltas.
+    """
+    rows = []
+    # In key order, so concurrent writers lock the rows in the same order
+    for (user_id, bucket), measures in sorted(deltas.items(), key=lambda item: item[0]):
+        if any(measures.values()):
+            rows.append({"user_id": user_id, "bucket_start": bucket,
+                         **{measure: measures.get(measure, 0) for measure in ROLLUP_MEASURES}})
+    if not rows:
+        return
+    statement = upsert(OrderRollup, connection.dialect.name)
+    statement = statement.on_conflict_do_update(
+        index_elements=[OrderRollup.user_id, OrderRollup.bucket_start],
+        set_={measure: getattr(OrderRollup, measure) + statement.excluded[measure] for measure in ROLLUP_MEASURES},
+    )
+    connection.execute(statement, rows)
+
+
+def _values(order: Order, previous: bool) -> Dict:
+    if not previous:
+        return {name: getattr(order, name) for name in _TRACKED_ATTRIBUTES}
+    state = inspect(order)
+    values = {}
+    for name in _TRACKED_ATTRIBUTES:
+        history = state.attrs[name].history
+        values[name] = history.deleted[0] if history.deleted else getattr(order, name)
+    return values
+
+
+def _accumulate_values(deltas, values: Dict, sign: int = 1):
+    accumulate_rollup(deltas, values["user_id"], values["created_at"], rollup_contribution(
+        values["status"], values["item_count"], values["total"], values["discount"], values["tax"],
+        values["shipping_fee"],
+    ), sign)
+
+
+@event.listens_for(Order, "after_insert")
+def _order_inserted(mapper, connection, target):
+    deltas = new_rollup_deltas()
+    _accumulate_values(deltas, _values(target, previous=False))
+    apply_rollup_deltas(connection, deltas)
+
+
+@event.listens_for(Order, "after_update")
+def _order_updated(mapper, connection, target):
+    old, new = _values(target, previous=True), _values(target, previous=False)
+    if old == new:
+        return
+    deltas = new_rollup_deltas()
+    _accumulate_values(deltas, old, sign=-1)
+    _accumulate_values(deltas, new)
+    apply_rollup_deltas(connection, deltas)
+
+
+@event.listens_for(Order, "after_delete")
+def _order_deleted(mapper, connection, target):
+    deltas = new_rollup_deltas()
+    _accumulate_values(deltas, _values(target, previous=True), sign=-1)
+    apply_rollup_deltas(connection, deltas)
+
+
+async def order_analytics(db: AsyncSession, user_id: int, granularity: str,
+                          start: datetime, end: datetime) -> Dict:
+    """Order totals from start to end in contiguous buckets, empty ones included.
+
+    The range is widened to whole buckets: the first bucket is the one
+    containing `start` and the last the one containing the instant before
+    `end`. Times are UTC.
+    """
+    start, end = naive_utc(start), naive_utc(end)
+    if granularity not in GRANULARITIES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"granularity must be one of: {', '.join(GRANULARITIES)}"
+        )
+    if end <= start:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="end must be after start")
+    first, step = bucket_start(start, granularity), _step(granularity)
+    if (end - first) / step > MAX_ANALYTICS_BUCKETS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_ANALYTICS_BUCKETS} buckets per request; use a coarser granularity"
+        )
+
+    buckets = {}
+    moment = first
+    while moment < end:
+        buckets[moment] = dict.fromkeys(ROLLUP_MEASURES, 0)
+        moment += step
+
+    rows = await db.execute(
+        select(OrderRollup.bucket_start, *(getattr(OrderRollup, measure) for measure in ROLLUP_MEASURES))
+        .where(
+            OrderRollup.user_id == user_id,
+            OrderRollup.bucket_start >= first,
+            OrderRollup.bucket_start < moment,
+        )
+    )
+    for row in rows:
+        totals = buckets[bucket_start(row.bucket_start, granularity)]
+        for measure in ROLLUP_MEASURES:
+            # shipping_fee is NULL on hours not yet backfilled
+            totals[measure] += getattr(row, measure) or 0
+
+    series = [{"bucket_start": moment, **totals} for moment, totals in buckets.items()]
+    return {
+        "granularity": granularity,
+        "start": first,
+        "end": moment,
+        "buckets": series,
+        "totals": {measure: sum(bucket[measure] for bucket in series) for measure in ROLLUP_MEASURES},
+    }
+
+
+def _hour_expression(dialect_name: str):
+    if dialect_name == "postgresql":
+        return func.date_trunc("hour", Order.created_at)
+    # Same text format SQLAlchemy uses for SQLite DateTime columns, so the
+    # rows compare correctly against bound datetimes
+    return func.strftime("%Y-%m-%d %H:00:00.000000", Order.created_at)
+
+
+async def backfill_order_rollups(db: AsyncSession, user_id: Optional[int] = None,
+                                 since: Optional[datetime] = None) -> int:
+    """Rebuild order_rollups from the orders table with one INSERT ... SELECT.
+
+    Rows in scope (all sellers or one, from `since` onwards) are deleted and
+    recomputed in the same transaction. Returns the number of rollup rows
+    written.
+    """
+    hour = _hour_expression(db.bind.dialect.name).label("bucket_start")
+    counted = Order.status.in_(COUNTED_STATUSES)
+    refunded = Order.status == "refunded"
+    aggregate = select(
+        Order.user_id,
+        hour,
+        func.count(case((counted, Order.id))),
+        func.coalesce(func.sum(case((counted, Order.item_count), else_=0)), 0),
+        func.coalesce(func.sum(case((counted, Order.total), else_=0.0)), 0.0),
+        func.coalesce(func.sum(case((counted, Order.discount), else_=0.0)), 0.0),
+        func.coalesce(func.sum(case((counted, Order.tax), else_=0.0)), 0.0),
+        func.coalesce(func.sum(case((counted, Order.shipping_fee), else_=0.0)), 0.0),
+        func.count(case((refunded, Order.id))),
+        func.coalesce(func.sum(case((refunded, Order.total), else_=0.0)), 0.0),
+    ).group_by(Order.user_id, hour).having(func.count(case((counted | refunded, Order.id))) > literal(0))
+
+    stale = delete(OrderRollup)
+    if user_id is not None:
+        aggregate = aggregate.where(Order.user_id == user_id)
+        stale = stale.where(OrderRollup.user_id == user_id)
+    if since is not None:
+        aggregate = aggregate.where(Order.created_at >= hour_bucket(since))
+        stale = stale.where(OrderRollup.bucket_start >= hour_bucket(since))
+
+    await db.execute(stale)
+    result = await db.execute(
+        insert(OrderRollup).from_select(["user_id", "bucket_start", *ROLLUP_MEASURES], aggregate)
+    )
+    await db.commit()
+    return result.rowcount
@@ -0,0 +1,53 @@
+from typing import Dict, List, Optional, Sequence, Type
+import orjson
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy.engine import Row
+
+
+class RowSerializer:
+    """Turns query results straight into JSON bytes for one response model.
+
+    Returning the Response ourselves skips FastAPI's second pass over the
+    data (validate against response_model, jsonable_encoder, json.dumps);
+    keep response_model on the route for the OpenAPI schema.
+
+    ORM objects go through a TypeAdapter with from_attributes, validated
+    and dumped in one batch by pydantic-core. Row tuples whose columns are
+    exactly the model's fields, in order, are trusted as-is and handed to
+    orjson without building a model per row.
+    """
+
+    def __init__(self, model: Type[BaseModel]):
+        self.model = model
+        self.fields = tuple(model.model_fields)
+        self.item_adapter = TypeAdapter(model)
+        self.list_adapter = TypeAdapter(List[model])
+
+    def columns(self, entity) -> List:
+        """The entity's columns for this model's fields, in field order.
+
+        `select(*serializer.columns(Model))` loads only what the response
+        needs, as plain Row tuples that take the orjson path.
+        """
+        return [getattr(entity, name) for name in self.fields]
+
+    def _is_projection(self, row) -> bool:
+        return isinstance(row, Row) and row._fields == self.fields
+
+    def dump_list(self, rows: Sequence) -> bytes:
+        if rows and self._is_projection(rows[0]):
+            fields = self.fields
+            return orjson.dumps([dict(zip(fields, row)) for row in rows])
+        return self.list_adapter.dump_json(self.list_adapter.validate_python(rows, from_attributes=True))
+
+    def dump_item(self, row) -> bytes:
+        if self._is_projection(row):
+            return orjson.dumps(dict(zip(self.fields, row)))
+        return self.item_adapter.dump_json(self.item_adapter.validate_python(row, from_attributes=True))
+
+    def list_response(self, rows: Sequence, headers: Optional[Dict[str, str]] = None) -> Response:
+        return Response(self.dump_list(rows), media_type="application/json", headers=headers)
+
+    def item_response(self, row, headers: Optional[Dict[str, str]] = None) -> Response:
+        return Response(self.dump_item(row), media_type="application/json", headers=headers)
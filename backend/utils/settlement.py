@@ -0,0 +1,156 @@
+import logging
+import os
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.model import Dashboard, Withdrawal
+from utils import metrics
+from utils.dashboard_cache import mark_dashboards_dirty
+from utils.payouts import PayoutAdapter
+
+
+# Pending withdrawals are settled in batches, in three steps so that no
+# transaction is open while the payout provider is called:
+#
+#   1. claim: a short transaction picks pending rows with FOR UPDATE SKIP
+#      LOCKED (so any number of worker processes can run side by side),
+#      marks them "processing" and commits;
+#   2. pay: the rows go to the payout adapter, grouped by method;
+#   3. record: a second transaction marks each one completed or failed.
+#      Failed payouts give the amount back to the seller's balance.
+#
+# A worker that dies between 1 and 3 leaves its rows "processing". They are
+# claimed again once SETTLEMENT_CLAIM_TIMEOUT has passed and re-sent, which
+# is safe because adapters de-duplicate on transaction_id (see
+# PayoutAdapter). The timeout must comfortably exceed a batch's payout time.
+logger = logging.getLogger(__name__)
+
+SETTLEMENT_CLAIM_TIMEOUT = float(os.getenv("SETTLEMENT_CLAIM_TIMEOUT", 600))
+
+settled = metrics.counter(
+    "withdrawals_settled_total", "Withdrawals settled by the worker", ["method", "outcome"]
+)
+payout_errors = metrics.counter(
+    "settlement_payout_errors_total", "Payout batches that raised; their withdrawals are retried", ["method"]
+)
+batch_duration = metrics.histogram(
+    "settlement_batch_duration_seconds", "Time to claim, pay out and record one batch"
+)
+settlement_lag = metrics.histogram(
+    "settlement_lag_seconds", "Time from withdrawal request to settlement",
+    buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600),
+)
+oldest_pending_age = metrics.gauge(
+    "settlement_oldest_claimed_age_seconds", "Age of the oldest withdrawal in the last batch"
+)
+
+
+async def _claim(db: AsyncSession, batch_size: int) -> List:
+    now = datetime.utcnow()
+    claimable = (Withdrawal.status == "pending") | (
+        (Withdrawal.status == "processing")
+        & (Withdrawal.claimed_at < now - timedelta(seconds=SETTLEMENT_CLAIM_TIMEOUT))
+    )
+    claimed = (await db.execute(
+        select(
+            Withdrawal.id, Withdrawal.user_id, Withdrawal.method, Withdrawal.phone_number,
+            Withdrawal.amount, Withdrawal.currency, Withdrawal.transaction_id, Withdrawal.created_at,
+        )
+        .where(claimable)
+        .order_by(Withdrawal.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )).all()
+    if claimed:
+        await db.execute(
+            update(Withdrawal)
+            .where(Withdrawal.id.in_([row.id for row in claimed]))
+            .values(status="processing", claimed_at=now)
+            .execution_options(synchronize_session=False)
+        )
+    await db.commit()
+    return claimed
+
+
+async def _pay(adapter: PayoutAdapter, claimed: List) -> Dict[int, bool]:
+    """Outcome per withdrawal id; ids missing from it stay claimed and are retried."""
+    by_method = defaultdict(list)
+    for row in claimed:
+        by_method[row.method].append(row)
+    claimed_ids = {row.id for row in claimed}
+    outcomes = {}
+    for method, rows in by_method.items():
+        try:
+            results = await adapter.send_batch(method, rows)
+        except Exception:
+            logger.exception("Payout of %d %s withdrawal(s) failed; retrying after the claim times out",
+                             len(rows), method)
+            payout_errors.labels(method).inc()
+            continue
+        for result in results:
+            if result.withdrawal_id in claimed_ids:
+                outcomes[result.withdrawal_id] = result.succeeded
+    return outcomes
+
+
+async def _record(db: AsyncSession, outcomes: Dict[int, bool]) -> Dict[str, List]:
+    """Mark claimed withdrawals completed or failed and refund the failed ones.
+
+    Only rows still "processing" are updated, so if two workers end up
+    recording the same withdrawal (after a timed-out claim) the second
+    changes nothing and refunds nothing.
+    """
+    now = datetime.utcnow()
+    table = Withdrawal.__table__
+    recorded = {}
+    for status, succeeded in (("completed", True), ("failed", False)):
+        ids = [withdrawal_id for withdrawal_id, outcome in outcomes.items() if outcome is succeeded]
+        recorded[status] = (await db.execute(
+            update(table)
+            .where(table.c.id.in_(ids), table.c.status == "processing")
+            .values(status=status, processed_at=now)
+            .returning(table.c.id, table.c.user_id, table.c.amount, table.c.method, table.c.created_at)
+        )).all() if ids else []
+
+    refunds = defaultdict(float)
+    for row in recorded["failed"]:
+        refunds[row.user_id] += row.amount
+    if refunds:
+        dashboards = Dashboard.__table__
+        await db.execute(
+            update(dashboards)
+            .where(dashboards.c.user_id == bindparam("b_user_id"))
+            .values(balance=dashboards.c.balance + bindparam("amount"), updated_at=now),
+            [{"b_user_id": user_id, "amount": amount} for user_id, amount in refunds.items()],
+        )
+        mark_dashboards_dirty(db.sync_session, refunds)
+    await db.commit()
+    return recorded
+
+
+async def settle_batch(db: AsyncSession, adapter: PayoutAdapter, batch_size: int) -> Dict[str, int]:
+    """Claim, pay out and record up to `batch_size` withdrawals.
+
+    Returns counts of completed and failed withdrawals, and of claimed ones
+    left unsettled because their payout raised; all are zero when nothing
+    was pending.
+    """
+    started = time.perf_counter()
+    claimed = await _claim(db, batch_size)
+    if not claimed:
+        return {"completed": 0, "failed": 0, "unsettled": 0}
+
+    recorded = await _record(db, await _pay(adapter, claimed))
+
+    now = datetime.utcnow()
+    for status, rows in recorded.items():
+        for row in rows:
+            settled.labels(row.method, status).inc()
+            settlement_lag.observe((now - row.created_at).total_seconds())
+    oldest_pending_age.set((now - min(row.created_at for row in claimed)).total_seconds())
+    batch_duration.observe(time.perf_counter() - started)
+    completed, failed = len(recorded["completed"]), len(recorded["failed"])
+    return {"completed": completed, "failed": failed, "unsettled": len(claimed) - completed - failed}
@@ -0,0 +1,28 @@
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import DBAPIError, IntegrityError
+
+
+# INSERT ... ON CONFLICT, used for counters, rollups and bulk writes, is
+# built with each backend's own insert construct
+_UPSERT_DIALECTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def upsert(table, dialect_name: str):
+    """An INSERT for `table` that supports .on_conflict_do_update()."""
+    try:
+        return _UPSERT_DIALECTS[dialect_name](table)
+    except KeyError:
+        raise ValueError(
+            f"Upserts are only supported on {', '.join(_UPSERT_DIALECTS)}, not {dialect_name}"
+        ) from None
+
+
+def is_foreign_key_violation(error: IntegrityError) -> bool:
+    # PostgreSQL reports SQLSTATE 23503; SQLite only has the message
+    return getattr(error.orig, "sqlstate", None) == "23503" or "FOREIGN KEY constraint failed" in str(error.orig)
+
+
+def is_serialization_failure(error: DBAPIError) -> bool:
+    # SQLSTATE 40001: a REPEATABLE READ or SERIALIZABLE transaction lost a
+    # race and should be retried from the start
+    return getattr(error.orig, "sqlstate", None) == "40001"
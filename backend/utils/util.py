@@ -1,33 +1,124 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
 from typing import Optional
+from dataclasses import dataclass, fields
 from passlib.context import CryptContext
 from dotenv import load_dotenv
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session, object_session
 from config.database import SessionLocal
 from models.model import User
+from utils.cache import TTLCache
+import hashlib
+import hmac
+import logging
 import os
+import time
 import uuid
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# Loaded once at startup; get_current_user no longer reads the environment
 SECRET_KEY = os.getenv("SECRET_KEY")
-ALGORITHM = os.getenv("ALGORITHM")
+ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
 
+if not SECRET_KEY:
+    raise ValueError("SECRET_KEY environment variable is not set.")
+
+# Operator endpoints (/admin/...) take this shared token in X-Admin-Token;
+# they are disabled while it is unset.
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+ADMIN_TOKEN_HEADER = "X-Admin-Token"
+
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
 
+# Authenticated users are cached by token subject (username) so that
+# authenticated endpoints don't look the user up again on every request.
+# The cache is per process: a committed change to a user drops the entry in
+# the process that made it, but other workers keep serving the old snapshot
+# (including is_active) for up to PRINCIPAL_CACHE_TTL_SECONDS.
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", 30))
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", 10000))
+
+principal_cache = TTLCache("principal", PRINCIPAL_CACHE_SIZE, PRINCIPAL_CACHE_TTL_SECONDS)
+
+# Payloads of tokens whose signature was already verified, keyed by a digest
+# of the token. Entries never outlive the token's own `exp`.
+TOKEN_CACHE_TTL_SECONDS = float(os.getenv("TOKEN_CACHE_TTL_SECONDS", 300))
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", 10000))
+
+token_cache = TTLCache("token", TOKEN_CACHE_SIZE, TOKEN_CACHE_TTL_SECONDS)
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Read-only snapshot of the authenticated User, safe to share across sessions."""
+    id: int
+    username: str
+    email: str
+    phone_number: str
+    is_active: Optional[bool]
+    created_at: datetime
+
+    @classmethod
+    def from_user(cls, user) -> "Principal":
+        """Build from a User or a Row selected with PRINCIPAL_COLUMNS."""
+        return cls(
+            id=user.id,
+            username=user.username,
+            email=user.email,
+            phone_number=user.phone_number,
+            is_active=user.is_active,
+            created_at=user.created_at,
+        )
+
+
+PRINCIPAL_COLUMNS = tuple(getattr(User, field.name) for field in fields(Principal))
+
+
+_SESSION_KEY = "changed_usernames"
+
+
+def invalidate_principal(username: str):
+    principal_cache.invalidate(username)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_changed_user(mapper, connection, target):
+    # Dropped once the change commits, so a request in between can't cache
+    # the old row again. Both the old and the new username when renamed.
+    history = inspect(target).attrs.username.history
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_SESSION_KEY, set()).update((*history.deleted, target.username))
+
 
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    for username in session.info.pop(_SESSION_KEY, ()):
+        invalidate_principal(username)
 
-def get_db():
+
+@event.listens_for(Session, "after_rollback")
+def _forget_after_rollback(session):
+    session.info.pop(_SESSION_KEY, None)
+
+
+
+async def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
+        await db.close()
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -47,15 +138,22 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def authenticate_user(db: Session, email: str, password: str):
-    user = db.query(User).filter(User.email == email).first()
-    if not user or not verify_password(password, user.hashed_password):
-        return False
-    return user
+def decode_access_token(token: str) -> dict:
+    key = hashlib.sha256(token.encode()).digest()
+    payload = token_cache.get(key)
+    if payload is None:
+        # Verify signature and expiry
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        ttl = TOKEN_CACHE_TTL_SECONDS
+        if "exp" in payload:
+            ttl = min(ttl, payload["exp"] - time.time())
+        if ttl > 0:
+            token_cache.set(key, payload, ttl)
+    return payload
 
-def get_current_user(
+async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security), 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -64,42 +162,35 @@ def get_current_user(
     )
     
     try:
-        SECRET_KEY = os.getenv("SECRET_KEY")
-        if not SECRET_KEY:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Server configuration error"
-            )
-        
-        # Decode the JWT token
-        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
-        print("Decoded payload:", payload)  # Consider removing in production
-        
-        # Extract username from token subject
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-            
+        payload = decode_access_token(credentials.credentials)
     except jwt.ExpiredSignatureError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token has expired",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    except jwt.InvalidTokenError:
-        print("Invalid token error")  # Consider logging instead of print
+    except JWTError:
         raise credentials_exception
-    except Exception as e:
-        print(f"Unexpected error during token validation: {e}")
+    except Exception:
+        logger.exception("Unexpected error during token validation")
         raise credentials_exception
-    
-    # Query user from database
-    user = db.query(User).filter(User.username == username).first()
+
+    # Extract username from token subject
+    username: str = payload.get("sub")
+    if username is None:
+        raise credentials_exception
+
+    user = principal_cache.get(username)
     if user is None:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
+        # Query user from database
+        db_user = (await db.execute(select(*PRINCIPAL_COLUMNS).where(User.username == username))).first()
+        if db_user is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found"
+            )
+        user = Principal.from_user(db_user)
+        principal_cache.set(username, user)
     
     # Optional: Check if user is active
     # if not user.is_active:
@@ -110,5 +201,15 @@ def get_current_user(
     
     return user
 
+def is_admin_token(token: Optional[str]) -> bool:
+    return bool(ADMIN_TOKEN) and hmac.compare_digest(token or "", ADMIN_TOKEN)
+
+
+async def require_admin(x_admin_token: Optional[str] = Header(None)):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not is_admin_token(x_admin_token):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid admin token")
+
 def generate_transaction_id():
     return f"TXN{datetime.now().strftime('%Y%m%d%H%M%S')}{str(uuid.uuid4())[:8].upper()}"
\ No newline at end of file
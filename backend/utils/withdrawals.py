@@ -0,0 +1,63 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import insert, literal, select, update
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.model import Dashboard, Withdrawal
+
+
+_RETURNED = (
+    Withdrawal.id, Withdrawal.method, Withdrawal.phone_number, Withdrawal.amount,
+    Withdrawal.currency, Withdrawal.status, Withdrawal.transaction_id, Withdrawal.created_at,
+)
+
+
+async def debit_and_record_withdrawal(
+    db: AsyncSession,
+    user_id: int,
+    method: str,
+    phone_number: str,
+    amount: float,
+    currency: str,
+    transaction_id: str,
+) -> Optional[Row]:
+    """Debit the balance and insert the Withdrawal row, or do nothing.
+
+    The balance check is part of the UPDATE's WHERE clause, so concurrent
+    withdrawals can never overdraw an account and no row lock is held while
+    the application decides. Returns the new withdrawal, or None when the
+    balance was insufficient (or the user has no dashboard).
+
+    On PostgreSQL the debit and insert are one statement (a data-modifying
+    CTE), i.e. a single round trip. Other databases use two statements in the
+    caller's transaction. The caller commits.
+    """
+    now = datetime.utcnow()
+    debit = (
+        update(Dashboard)
+        .where(Dashboard.user_id == user_id, Dashboard.balance >= amount)
+        .values(balance=Dashboard.balance - amount, updated_at=now)
+        .returning(Dashboard.user_id)
+    )
+    values = {
+        "method": method,
+        "phone_number": phone_number,
+        "amount": amount,
+        "currency": currency,
+        "status": "pending",
+        "transaction_id": transaction_id,
+        "created_at": now,
+    }
+
+    if db.bind.dialect.name == "postgresql":
+        debited = debit.cte("debited")
+        statement = insert(Withdrawal).from_select(
+            ["user_id", *values],
+            select(debited.c.user_id, *(literal(value) for value in values.values())),
+        ).returning(*_RETURNED)
+        return (await db.execute(statement)).first()
+
+    if (await db.execute(debit)).first() is None:
+        return None
+    statement = insert(Withdrawal).values(user_id=user_id, **values).returning(*_RETURNED)
+    return (await db.execute(statement)).first()